@@ -8,17 +8,22 @@ from app.services.solver_service import SolverService, solver_service
 from app.settings import load_settings
 
 settings = load_settings()
+
+if settings.db_backend == "postgres":
+    # session.py crea el engine al importarse: solo se carga con el backend postgres.
+    from app.infra.db.session import get_db
+    from app.infra.repositories.sql_project_repository import SqlProjectRepository
+
 _memory_repository = InMemoryProjectRepository()
+# Sin estado por petición: una única instancia sirve a todas las peticiones.
+_memory_service = ProjectService(repository=_memory_repository)
 
 
 def _get_memory_project_service() -> ProjectService:
-    return ProjectService(repository=_memory_repository)
+    return _memory_service
 
 
 def _get_postgres_project_service() -> Generator[ProjectService, None, None]:
-    from app.infra.db.session import get_db
-    from app.infra.repositories.sql_project_repository import SqlProjectRepository
-
     for db in get_db():
         yield ProjectService(repository=SqlProjectRepository(db))
 
@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+from collections.abc import Iterable
+from hashlib import blake2b
+from typing import Any
+
+import orjson
+from fastapi import Request, Response
+from fastapi.responses import JSONResponse
+
+from app.infra.repositories.project_repository import ProjectRecord
+
+
+class OrjsonResponse(JSONResponse):
+    """JSONResponse rendered with orjson, bypassing the response_model round trip."""
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content)
+
+
+def projects_etag(projects: Iterable[ProjectRecord]) -> str:
+    """Strong ETag derived from ids and updated_at, which every write bumps."""
+    digest = blake2b(digest_size=8)
+    for project in projects:
+        digest.update(f"{project.id}|{project.updated_at.isoformat()};".encode())
+    return f'"{digest.hexdigest()}"'
+
+
+def conditional_response(request: Request, response: Response, etag: str) -> Response | None:
+    """Tag `response` with `etag`; return a 304 if the client already holds it."""
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    response.headers.update(headers)
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        if etag in candidates or "*" in candidates:
+            return Response(status_code=304, headers=headers)
+    return None
@@ -1,8 +1,11 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends, Response, status
+import asyncio
+
+from fastapi import APIRouter, Depends, Query, Request, Response, status
 
 from app.api.deps import get_project_service, get_solver_service
+from app.api.responses import OrjsonResponse, conditional_response, projects_etag
 from app.api.schemas import (
     ProjectCreateRequest,
     ProjectDetailResponse,
@@ -17,8 +20,9 @@ from app.services.solver_service import SolverService
 router = APIRouter(prefix="/projects", tags=["projects"])
 
 
+# ProjectRecord already carries typed, trusted data: skip field validation.
 def _to_summary(project: ProjectRecord) -> ProjectSummaryResponse:
-    return ProjectSummaryResponse(
+    return ProjectSummaryResponse.model_construct(
         id=project.id,
         name=project.name,
         created_at=project.created_at,
@@ -27,7 +31,7 @@ def _to_summary(project: ProjectRecord) -> ProjectSummaryResponse:
 
 
 def _to_detail(project: ProjectRecord) -> ProjectDetailResponse:
-    return ProjectDetailResponse(
+    return ProjectDetailResponse.model_construct(
         id=project.id,
         name=project.name,
         created_at=project.created_at,
@@ -38,8 +42,19 @@ def _to_detail(project: ProjectRecord) -> ProjectDetailResponse:
 
 
 @router.get("", response_model=list[ProjectSummaryResponse])
-def list_projects(service: ProjectService = Depends(get_project_service)) -> list[ProjectSummaryResponse]:
-    return [_to_summary(project) for project in service.list_projects()]
+def list_projects(
+    request: Request,
+    response: Response,
+    limit: int | None = Query(default=None, ge=1, le=1000),
+    offset: int = Query(default=0, ge=0),
+    service: ProjectService = Depends(get_project_service),
+) -> list[ProjectSummaryResponse] | Response:
+    # Summaries never include the problem payload, so don't load it.
+    projects = service.list_projects(limit=limit, offset=offset, with_problem=False)
+    not_modified = conditional_response(request, response, projects_etag(projects))
+    if not_modified is not None:
+        return not_modified
+    return [_to_summary(project) for project in projects]
 
 
 @router.post("", response_model=ProjectDetailResponse, status_code=status.HTTP_201_CREATED)
@@ -54,9 +69,15 @@ def create_project(
 @router.get("/{project_id}", response_model=ProjectDetailResponse)
 def get_project(
     project_id: str,
+    request: Request,
+    response: Response,
     service: ProjectService = Depends(get_project_service),
-) -> ProjectDetailResponse:
-    return _to_detail(service.get_project(project_id))
+) -> ProjectDetailResponse | Response:
+    project = service.get_project(project_id)
+    not_modified = conditional_response(request, response, projects_etag([project]))
+    if not_modified is not None:
+        return not_modified
+    return _to_detail(project)
 
 
 @router.put("/{project_id}", response_model=ProjectDetailResponse)
@@ -78,13 +99,23 @@ def delete_project(
     return Response(status_code=status.HTTP_204_NO_CONTENT)
 
 
-@router.post("/{project_id}/solve", response_model=SolveResponse)
-def solve_project(
+@router.post(
+    "/{project_id}/solve",
+    response_model=None,
+    response_class=OrjsonResponse,
+    responses={200: {"model": SolveResponse}},
+)
+async def solve_project(
     project_id: str,
     project_service: ProjectService = Depends(get_project_service),
     solver_service: SolverService = Depends(get_solver_service),
-) -> dict:
-    project = project_service.get_project(project_id)
-    solution = solver_service.solve_problem(project.problem)
-    project_service.attach_solution(project_id, solution)
-    return solution
+) -> OrjsonResponse:
+    # El repositorio es síncrono (SQLAlchemy): cada acceso va a un hilo para no bloquear el event loop.
+    project = await asyncio.to_thread(project_service.get_project, project_id)
+    # CP-SAT es CPU-bound: se ejecuta fuera del event loop.
+    # La última solución del proyecto sirve de pista: tras pequeñas ediciones CP-SAT arranca de ella.
+    solution = await asyncio.to_thread(
+        solver_service.solve_problem, project.problem, project.last_solution
+    )
+    await asyncio.to_thread(project_service.attach_solution, project_id, solution)
+    return OrjsonResponse(solution)
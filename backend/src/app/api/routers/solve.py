@@ -1,8 +1,13 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends
+import asyncio
+from typing import Any
+
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Request
 
 from app.api.deps import get_solver_service
+from app.api.responses import OrjsonResponse
 from app.api.schemas import SolveRequest, SolveResponse, ValidateResponse
 from app.services.solver_service import SolverService
 
@@ -18,9 +23,36 @@ def validate_problem(
     return ValidateResponse(ok=report.ok, errors=report.errors, warnings=report.warnings)
 
 
-@router.post("", response_model=SolveResponse)
-def solve_problem(
-    body: SolveRequest,
+async def _read_problem(request: Request) -> dict[str, Any]:
+    """Decode `{"problem": {...}}` straight from the body with orjson (no Pydantic pass)."""
+    payload = orjson.loads(await request.body())  # JSONDecodeError es ValueError -> 400
+    problem = payload.get("problem") if isinstance(payload, dict) else None
+    if not isinstance(problem, dict):
+        raise HTTPException(
+            status_code=422,
+            detail="Body must be a JSON object with a 'problem' object.",
+        )
+    return problem
+
+
+@router.post(
+    "",
+    response_model=None,
+    response_class=OrjsonResponse,
+    responses={200: {"model": SolveResponse}},
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {"application/json": {"schema": SolveRequest.model_json_schema()}},
+        }
+    },
+)
+async def solve_problem(
+    request: Request,
     service: SolverService = Depends(get_solver_service),
-) -> dict:
-    return service.solve_problem(body.problem)
+) -> OrjsonResponse:
+    problem = await _read_problem(request)
+    # CP-SAT es CPU-bound: se ejecuta fuera del event loop.
+    solution = await asyncio.to_thread(service.solve_problem, problem)
+    # La salida del solver ya es un dict limpio: se serializa tal cual.
+    return OrjsonResponse(solution)
@@ -1,7 +1,7 @@
 # core/io.py
 from __future__ import annotations
 
-from dataclasses import asdict
+import sys
 from typing import Any, Dict, Iterable, List, Optional, Tuple
 
 from app.domain.core.schema import (
@@ -22,131 +22,187 @@ from app.domain.core.schema import (
 )
 
 
-def _slot_from_dict(d: Dict[str, Any]) -> Slot:
-    return Slot(day=str(d["day"]), period=int(d["period"]))
+# Los parsers JSON ya entregan int/bool/str: `type(v) is ...` evita la llamada de
+# conversión en el caso normal (y no confunde bool con int, al contrario que isinstance).
 
+def _as_int(v: Any) -> int:
+    return v if type(v) is int else int(v)
 
-def _slots_from_list(xs: Optional[Iterable[Dict[str, Any]]]) -> Tuple[Slot, ...]:
-    if not xs:
-        return tuple()
-    return tuple(_slot_from_dict(x) for x in xs)
+
+def _opt_int(v: Any) -> Optional[int]:
+    return None if v is None else (v if type(v) is int else int(v))
+
+
+def _as_bool(v: Any) -> bool:
+    return v if type(v) is bool else bool(v)
+
+
+def _as_str(v: Any) -> str:
+    return v if type(v) is str else str(v)
 
 
-def _roomtype(v: Any) -> RoomType:
-    # admite "LAB" o RoomType.LAB ya serializado como string
-    return RoomType(str(v))
+def _id(v: Any) -> Any:
+    # Ids internados: la misma cadena en grupos, requisitos y teacher_assignment es el mismo
+    # objeto, así las claves (group, subject) se comparan por identidad en los dicts del solver.
+    # Solo se internan str: cualquier otro tipo pasa tal cual (y lo juzga validate).
+    return sys.intern(v) if type(v) is str else v
 
 
-def _teacherpolicy(v: Any) -> TeacherPolicy:
-    return TeacherPolicy(str(v))
+def _slot_from_dict(d: Dict[str, Any]) -> Slot:
+    return Slot(day=sys.intern(_as_str(d["day"])), period=_as_int(d["period"]))
+
+
+SlotPool = Dict[Tuple[str, int], Slot]
+
+
+def _slots_from_list(
+    xs: Optional[Iterable[Dict[str, Any]]],
+    pool: Optional[SlotPool] = None,
+) -> Tuple[Slot, ...]:
+    if not xs:
+        return tuple()
+    if pool is None:
+        return tuple([_slot_from_dict(x) for x in xs])
+
+    # Con pool: cada (day, period) se instancia una sola vez por problema.
+    out: List[Slot] = []
+    for x in xs:
+        key = (sys.intern(_as_str(x["day"])), _as_int(x["period"]))
+        slot = pool.get(key)
+        if slot is None:
+            slot = pool[key] = Slot(*key)
+        out.append(slot)
+    return tuple(out)
 
 
 def _frozenset_str(xs: Optional[Iterable[Any]]) -> frozenset[str]:
     if not xs:
         return frozenset()
-    return frozenset(str(x) for x in xs)
+    return frozenset([sys.intern(_as_str(x)) for x in xs])
 
 
 def _frozenset_int(xs: Optional[Iterable[Any]]) -> Optional[frozenset[int]]:
     if xs is None:
         return None
-    return frozenset(int(x) for x in xs)
+    return frozenset([_as_int(x) for x in xs])
 
 
-def calendar_from_dict(d: Dict[str, Any]) -> Calendar:
+def calendar_from_dict(d: Dict[str, Any], slot_pool: Optional[SlotPool] = None) -> Calendar:
     return Calendar(
-        days=tuple(d["days"]),
-        periods_per_day=int(d["periods_per_day"]),
-        blocked_slots=frozenset(_slots_from_list(d.get("blocked_slots"))),
+        days=tuple([sys.intern(_as_str(x)) for x in d["days"]]),
+        periods_per_day=_as_int(d["periods_per_day"]),
+        blocked_slots=frozenset(_slots_from_list(d.get("blocked_slots"), slot_pool)),
     )
 
 
 def problem_from_dict(d: Dict[str, Any]) -> TimetableProblem:
-    cal = calendar_from_dict(d["calendar"])
-
-    groups = tuple(
-        Group(id=g["id"], size=int(g["size"]))
-        for g in d.get("groups", [])
-    )
-
-    subjects = tuple(
-        Subject(
-            id=s["id"],
-            room_type_required=_roomtype(s.get("room_type_required", "NORMAL")),
-            max_per_day=(int(s["max_per_day"]) if s.get("max_per_day") is not None else None),
+    # Bucles explícitos con alias locales: evitan búsquedas globales por entidad
+    # en problemas grandes. RoomType/TeacherPolicy aceptan tanto "LAB" como el enum.
+    _RT = RoomType
+    _TP = TeacherPolicy
+    slot_pool: SlotPool = {}
+
+    def _slots(xs: Optional[Iterable[Dict[str, Any]]]) -> Tuple[Slot, ...]:
+        return _slots_from_list(xs, slot_pool)
+
+    cal = calendar_from_dict(d["calendar"], slot_pool)
+
+    groups: List[Group] = []
+    for g in d.get("groups", []):
+        groups.append(Group(id=_id(g["id"]), size=_as_int(g["size"])))
+
+    subjects: List[Subject] = []
+    for s in d.get("subjects", []):
+        subjects.append(
+            Subject(
+                id=_id(s["id"]),
+                room_type_required=_RT(s.get("room_type_required", "NORMAL")),
+                max_per_day=_opt_int(s.get("max_per_day")),
+            )
         )
-        for s in d.get("subjects", [])
-    )
 
-    teachers = tuple(
-        Teacher(
-            id=t["id"],
-            can_teach=_frozenset_str(t.get("can_teach")),
-            unavailable=frozenset(_slots_from_list(t.get("unavailable"))),
-            max_periods_per_day=(int(t["max_periods_per_day"]) if t.get("max_periods_per_day") is not None else None),
-            max_periods_per_week=(int(t["max_periods_per_week"]) if t.get("max_periods_per_week") is not None else None),
-            min_periods_per_day=(int(t["min_periods_per_day"]) if t.get("min_periods_per_day") is not None else None),
-            min_periods_per_week=(int(t["min_periods_per_week"]) if t.get("min_periods_per_week") is not None else None),
+    teachers: List[Teacher] = []
+    for t in d.get("teachers", []):
+        teachers.append(
+            Teacher(
+                id=_id(t["id"]),
+                can_teach=_frozenset_str(t.get("can_teach")),
+                unavailable=frozenset(_slots(t.get("unavailable"))),
+                max_periods_per_day=_opt_int(t.get("max_periods_per_day")),
+                max_periods_per_week=_opt_int(t.get("max_periods_per_week")),
+                min_periods_per_day=_opt_int(t.get("min_periods_per_day")),
+                min_periods_per_week=_opt_int(t.get("min_periods_per_week")),
+            )
         )
-        for t in d.get("teachers", [])
-    )
 
-    rooms = tuple(
-        Room(
-            id=r["id"],
-            type=_roomtype(r.get("type", "NORMAL")),
-            capacity=int(r.get("capacity", 9999)),
-            unavailable=frozenset(_slots_from_list(r.get("unavailable"))),
+    rooms: List[Room] = []
+    for r in d.get("rooms", []):
+        rooms.append(
+            Room(
+                id=_id(r["id"]),
+                type=_RT(r.get("type", "NORMAL")),
+                capacity=_as_int(r.get("capacity", 9999)),
+                unavailable=frozenset(_slots(r.get("unavailable"))),
+            )
         )
-        for r in d.get("rooms", [])
-    )
 
-    requirements = tuple(
-        CourseRequirement(
-            group_id=req["group_id"],
-            subject_id=req["subject_id"],
-            periods_per_week=int(req["periods_per_week"]),
-            max_consecutive=(int(req["max_consecutive"]) if req.get("max_consecutive") is not None else 2),
-            teacher_policy=_teacherpolicy(req.get("teacher_policy", "FIXED")),
-            teacher_id=req.get("teacher_id"),
-            teacher_pool=(tuple(req["teacher_pool"]) if req.get("teacher_pool") is not None else None),
-            preferred_periods=_frozenset_int(req.get("preferred_periods")),
-            forbidden_periods=_frozenset_int(req.get("forbidden_periods")),
-            allow_double=bool(req.get("allow_double", False)),
+    requirements: List[CourseRequirement] = []
+    for req in d.get("requirements", []):
+        max_consecutive = _opt_int(req.get("max_consecutive"))
+        teacher_pool = req.get("teacher_pool")
+        teacher_id = req.get("teacher_id")
+        requirements.append(
+            CourseRequirement(
+                group_id=_id(req["group_id"]),
+                subject_id=_id(req["subject_id"]),
+                periods_per_week=_as_int(req["periods_per_week"]),
+                max_consecutive=(max_consecutive if max_consecutive is not None else 2),
+                teacher_policy=_TP(req.get("teacher_policy", "FIXED")),
+                teacher_id=(_id(teacher_id) if teacher_id is not None else None),
+                teacher_pool=(tuple([_id(x) for x in teacher_pool]) if teacher_pool is not None else None),
+                preferred_periods=_frozenset_int(req.get("preferred_periods")),
+                forbidden_periods=_frozenset_int(req.get("forbidden_periods")),
+                allow_double=_as_bool(req.get("allow_double", False)),
+            )
         )
-        for req in d.get("requirements", [])
-    )
 
-    w = d.get("config", {}).get("weights", {})
+    cfg = d.get("config", {})
+    w = cfg.get("weights", {})
     weights = ObjectiveWeights(
-        teacher_gaps=int(w.get("teacher_gaps", 1000)),
-        teacher_late=int(w.get("teacher_late", 100)),
-        subject_same_day_excess=int(w.get("subject_same_day_excess", 10)),
-        preferred_period_penalty=int(w.get("preferred_period_penalty", 1)),
-        forbidden_period_penalty=int(w.get("forbidden_period_penalty", 50)),
+        teacher_gaps=_as_int(w.get("teacher_gaps", 1000)),
+        teacher_late=_as_int(w.get("teacher_late", 100)),
+        subject_same_day_excess=_as_int(w.get("subject_same_day_excess", 10)),
+        preferred_period_penalty=_as_int(w.get("preferred_period_penalty", 1)),
+        forbidden_period_penalty=_as_int(w.get("forbidden_period_penalty", 50)),
     )
 
-    cfg = d.get("config", {})
+    max_seconds = _opt_int(cfg.get("max_seconds"))
     config = SolveConfig(
-        max_seconds=(int(cfg["max_seconds"]) if cfg.get("max_seconds") is not None else 30),
-        random_seed=(int(cfg["random_seed"]) if cfg.get("random_seed") is not None else None),
+        max_seconds=(max_seconds if max_seconds is not None else 30),
+        random_seed=_opt_int(cfg.get("random_seed")),
+        num_workers=_opt_int(cfg.get("num_workers")),
         weights=weights,
-        forbidden_periods_hard=bool(cfg.get("forbidden_periods_hard", True)),
+        forbidden_periods_hard=_as_bool(cfg.get("forbidden_periods_hard", True)),
+        fast_mode=_as_bool(cfg.get("fast_mode", False)),
+        linearization_level=_opt_int(cfg.get("linearization_level")),
+        warmstart=_as_bool(cfg.get("warmstart", False)),
     )
 
     return TimetableProblem(
         calendar=cal,
-        groups=groups,
-        subjects=subjects,
-        teachers=teachers,
-        rooms=rooms,
-        requirements=requirements,
+        groups=tuple(groups),
+        subjects=tuple(subjects),
+        teachers=tuple(teachers),
+        rooms=tuple(rooms),
+        requirements=tuple(requirements),
         config=config,
     )
 
 
 def solution_to_dict(sol: TimetableSolution) -> Dict[str, Any]:
     # TimetableSolution contiene Slot y TeacherKey (tuple), así que serializamos “bonito”.
+    # Un dict de slot por evento: la salida se cachea y se guarda como last_solution,
+    # así que ningún objeto se comparte entre eventos.
     scheduled = [
         {
             "event_id": se.event_id,
@@ -157,13 +213,41 @@ def solution_to_dict(sol: TimetableSolution) -> Dict[str, Any]:
     ]
 
     teacher_assignment = [
-        {"group_id": k[0], "subject_id": k[1], "teacher_id": tid}
-        for k, tid in sol.teacher_assignment.items()
+        {"group_id": g, "subject_id": sub, "teacher_id": tid}
+        for (g, sub), tid in sol.teacher_assignment.items()
     ]
 
+    # solve() ya construye un dict nuevo por solución: solo se copia si es otro Mapping.
+    breakdown = sol.objective_breakdown
+    if type(breakdown) is not dict:
+        breakdown = dict(breakdown)
+
     return {
         "scheduled": scheduled,
         "teacher_assignment": teacher_assignment,
         "objective_value": sol.objective_value,
-        "objective_breakdown": dict(sol.objective_breakdown),
+        "objective_breakdown": breakdown,
+    }
+
+
+def solution_from_dict(d: Dict[str, Any]) -> TimetableSolution:
+    """Inversa de solution_to_dict (p.ej. para reutilizar la última solución de un proyecto)."""
+    pool: SlotPool = {}
+    scheduled = tuple(
+        ScheduledEvent(
+            event_id=_as_str(se["event_id"]),
+            slot=_slots_from_list((se["slot"],), pool)[0],
+            room_id=_as_str(se["room_id"]),
+        )
+        for se in d.get("scheduled") or []
+    )
+    teacher_assignment = {
+        (_as_str(ta["group_id"]), _as_str(ta["subject_id"])): _as_str(ta["teacher_id"])
+        for ta in d.get("teacher_assignment") or []
     }
+    return TimetableSolution(
+        scheduled=scheduled,
+        teacher_assignment=teacher_assignment,
+        objective_value=_opt_int(d.get("objective_value")),
+        objective_breakdown=dict(d.get("objective_breakdown") or {}),
+    )
@@ -6,7 +6,8 @@ from __future__ import annotations
 
 from dataclasses import dataclass, field, asdict
 from enum import Enum
-from typing import Dict, FrozenSet, List, Optional, Tuple
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
 
 
 # ---------- Tipos base ----------
@@ -14,9 +15,23 @@ from typing import Dict, FrozenSet, List, Optional, Tuple
 Day = str  # "mon".."sun" (normalmente "mon".."fri")
 
 
-@dataclass(frozen=True, order=True)
+# Periodos como máscara: bit p encendido <=> periodo p. Los periodos fuera de rango los
+# reporta validate; aquí solo se descartan para no crear enteros gigantes.
+_MAX_MASK_PERIOD = 1024
+
+
+def periods_mask(periods: Optional[Iterable[int]]) -> int:
+    """Máscara con el bit p encendido por cada periodo p (0 si no hay periodos)."""
+    mask = 0
+    for p in periods or ():
+        if 1 <= p <= _MAX_MASK_PERIOD:
+            mask |= 1 << p
+    return mask
+
+
+@dataclass(frozen=True, order=True, slots=True)
 class Slot:
-    """Un hueco lectivo."""
+    """Un hueco lectivo. `day` llega internado (sys.intern) desde io.py."""
     day: Day
     period: int  # 1..N
 
@@ -40,32 +55,67 @@ class TeacherPolicy(str, Enum):
 
 # ---------- Entidades ----------
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Calendar:
     """Define el horizonte temporal del problema (semana tipo)."""
     days: Tuple[Day, ...]                 # p.ej. ("mon","tue","wed","thu","fri")
     periods_per_day: int                  # p.ej. 6
     blocked_slots: FrozenSet[Slot] = field(default_factory=frozenset)  # recreos, actos, etc.
 
+    # day -> posición en days (ver slot_bit)
+    _day_idx: Dict[Day, int] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "_day_idx", {d: i for i, d in enumerate(self.days)})
+
+    def slot_bit(self, slot: Slot) -> Optional[int]:
+        """Bit del slot en las máscaras de este calendario (None si el slot cae fuera)."""
+        day_idx = self._day_idx.get(slot.day)
+        if day_idx is None or not 1 <= slot.period <= self.periods_per_day:
+            return None
+        return day_idx * self.periods_per_day + (slot.period - 1)
+
+    def slots_mask(self, slots: Iterable[Slot]) -> int:
+        """Máscara con el bit de cada slot; los que caen fuera del calendario se ignoran."""
+        mask = 0
+        for s in slots:
+            bit = self.slot_bit(s)
+            if bit is not None:
+                mask |= 1 << bit
+        return mask
+
     def all_slots(self) -> Tuple[Slot, ...]:
-        out: List[Slot] = []
-        for d in self.days:
-            for p in range(1, self.periods_per_day + 1):
-                out.append(Slot(d, p))
-        return tuple(out)
+        return _calendar_all_slots(self)
 
     def teaching_slots(self) -> Tuple[Slot, ...]:
         """Slots lectivos disponibles para clases."""
-        return tuple(s for s in self.all_slots() if s not in self.blocked_slots)
+        return _calendar_teaching_slots(self)
+
+
+# Calendar es inmutable y hashable: los slots se calculan una vez por calendario.
+@lru_cache(maxsize=256)
+def _calendar_all_slots(cal: Calendar) -> Tuple[Slot, ...]:
+    out: List[Slot] = []
+    for d in cal.days:
+        for p in range(1, cal.periods_per_day + 1):
+            out.append(Slot(d, p))
+    return tuple(out)
 
 
-@dataclass(frozen=True)
+@lru_cache(maxsize=256)
+def _calendar_teaching_slots(cal: Calendar) -> Tuple[Slot, ...]:
+    if not cal.blocked_slots:
+        return _calendar_all_slots(cal)
+    return tuple(s for s in _calendar_all_slots(cal) if s not in cal.blocked_slots)
+
+
+@dataclass(frozen=True, slots=True)
 class Group:
     id: str                 # "1ESO_A"
     size: int               # nº alumnos
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Subject:
     id: str                 # "MATH"
     room_type_required: RoomType = RoomType.NORMAL
@@ -74,7 +124,7 @@ class Subject:
     max_per_day: Optional[int] = None     # p.ej. no más de 1 al día
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Teacher:
     id: str
 
@@ -94,7 +144,7 @@ class Teacher:
         return slot not in self.unavailable
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Room:
     id: str
     type: RoomType = RoomType.NORMAL
@@ -109,7 +159,7 @@ class Room:
 
 # ---------- Requisitos curriculares ----------
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class CourseRequirement:
     """
     Requisito: el grupo g debe recibir X sesiones/semana de la asignatura sub.
@@ -133,13 +183,28 @@ class CourseRequirement:
     # Fase 2 (por ahora 1 slot por evento)
     allow_double: bool = False
 
+    # Derivados de preferred/forbidden_periods (ver periods_mask)
+    preferred_mask: int = field(init=False, repr=False, compare=False)
+    forbidden_mask: int = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        # Sets/listas de periodos se normalizan a frozenset: hashables y reutilizables como clave de caché.
+        for name in ("preferred_periods", "forbidden_periods"):
+            value = getattr(self, name)
+            if value is not None and type(value) is not frozenset:
+                object.__setattr__(self, name, frozenset(value))
+        object.__setattr__(self, "preferred_mask", periods_mask(self.preferred_periods))
+        object.__setattr__(self, "forbidden_mask", periods_mask(self.forbidden_periods))
+        if self.teacher_pool is not None and type(self.teacher_pool) is not tuple:
+            object.__setattr__(self, "teacher_pool", tuple(self.teacher_pool))
+
 
 # ---------- Eventos (expandido) ----------
 
 TeacherKey = Tuple[str, str]  # (group_id, subject_id)
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Event:
     """
     Unidad mínima a colocar en el horario.
@@ -158,7 +223,7 @@ class Event:
 
 # ---------- Preferencias y configuración de objetivos ----------
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class ObjectiveWeights:
     teacher_gaps: int = 1000
     teacher_late: int = 100
@@ -167,21 +232,32 @@ class ObjectiveWeights:
     forbidden_period_penalty: int = 50  # separado de preferred (suele ser más caro)
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class SolveConfig:
     """Parámetros del solver (sin acoplar a una librería concreta)."""
     max_seconds: Optional[int] = 30
     random_seed: Optional[int] = None
+    num_workers: Optional[int] = None  # hilos de búsqueda en paralelo; None = según nº de CPUs
     weights: ObjectiveWeights = ObjectiveWeights()
 
     # Si True: forbidden_periods se trata como hard.
     # Si False: se penaliza en objetivo.
     forbidden_periods_hard: bool = True
 
+    # Si True: búsqueda solo por LNS (buenas soluciones rápido, sin intentar probar el óptimo).
+    fast_mode: bool = False
+
+    # linearization_level de CP-SAT; None = default del solver (1). El 2 acota mejor en
+    # problemas pequeños pero en los grandes puede impedir encontrar una primera solución.
+    linearization_level: Optional[int] = None
+
+    # Si True: búsqueda tabú previa (una fracción de max_seconds) como pista para el solver.
+    warmstart: bool = False
+
 
 # ---------- Problema completo ----------
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class TimetableProblem:
     calendar: Calendar
     groups: Tuple[Group, ...]
@@ -191,34 +267,69 @@ class TimetableProblem:
     requirements: Tuple[CourseRequirement, ...]
     config: SolveConfig = SolveConfig()
 
+    # Índices por id, calculados una vez al construir (el problema es inmutable).
+    # No los modifiques: se comparten entre todas las llamadas a index_*().
+    _groups_idx: Dict[str, Group] = field(init=False, repr=False, compare=False)
+    _subjects_idx: Dict[str, Subject] = field(init=False, repr=False, compare=False)
+    _teachers_idx: Dict[str, Teacher] = field(init=False, repr=False, compare=False)
+    _rooms_idx: Dict[str, Room] = field(init=False, repr=False, compare=False)
+    # unavailable de cada profesor/aula como máscara sobre Calendar.slot_bit.
+    _teacher_unavailable: Dict[str, int] = field(init=False, repr=False, compare=False)
+    _room_unavailable: Dict[str, int] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        # Se aceptan listas (scripts, tests), pero se guardan como tuplas: el problema es inmutable.
+        for name in ("groups", "subjects", "teachers", "rooms", "requirements"):
+            value = getattr(self, name)
+            if type(value) is not tuple:
+                object.__setattr__(self, name, tuple(value))
+        object.__setattr__(self, "_groups_idx", {g.id: g for g in self.groups})
+        object.__setattr__(self, "_subjects_idx", {s.id: s for s in self.subjects})
+        object.__setattr__(self, "_teachers_idx", {t.id: t for t in self.teachers})
+        object.__setattr__(self, "_rooms_idx", {r.id: r for r in self.rooms})
+        cal = self.calendar
+        object.__setattr__(
+            self, "_teacher_unavailable", {t.id: cal.slots_mask(t.unavailable) for t in self.teachers}
+        )
+        object.__setattr__(
+            self, "_room_unavailable", {r.id: cal.slots_mask(r.unavailable) for r in self.rooms}
+        )
+
     def index_groups(self) -> Dict[str, Group]:
-        return {g.id: g for g in self.groups}
+        return self._groups_idx
 
     def index_subjects(self) -> Dict[str, Subject]:
-        return {s.id: s for s in self.subjects}
+        return self._subjects_idx
 
     def index_teachers(self) -> Dict[str, Teacher]:
-        return {t.id: t for t in self.teachers}
+        return self._teachers_idx
 
     def index_rooms(self) -> Dict[str, Room]:
-        return {r.id: r for r in self.rooms}
+        return self._rooms_idx
+
+    def teacher_unavailable_masks(self) -> Dict[str, int]:
+        return self._teacher_unavailable
+
+    def room_unavailable_masks(self) -> Dict[str, int]:
+        return self._room_unavailable
 
 
 # ---------- Solución (output del solver) ----------
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class ScheduledEvent:
     event_id: str
     slot: Slot
     room_id: str
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class TimetableSolution:
     scheduled: Tuple[ScheduledEvent, ...]
     teacher_assignment: Dict[TeacherKey, str]
     objective_value: Optional[int] = None
     objective_breakdown: Dict[str, int] = field(default_factory=dict)
+    optimal: bool = False  # True si el solver probó la optimalidad (no se cortó por tiempo)
 
 
 # ---------- Serialización simple ----------
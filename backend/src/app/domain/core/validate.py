@@ -3,13 +3,18 @@
 
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import Dict, List, Optional, Set, Tuple
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
 
 from app.domain.core.schema import (
     Calendar,
     CourseRequirement,
+    Group,
+    RoomType,
     Slot,
+    Subject,
+    Teacher,
     TeacherPolicy,
     TimetableProblem,
 )
@@ -24,27 +29,41 @@ class ValidationError(ValueError):
         super().__init__("\n".join(errors))
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class ValidationReport:
     ok: bool
     errors: List[str]
     warnings: List[str]
 
 
-def validate_problem(problem: TimetableProblem, *, raise_on_error: bool = True) -> ValidationReport:
+def validate_problem(
+    problem: TimetableProblem,
+    *,
+    raise_on_error: bool = True,
+    fail_fast: bool = False,
+) -> ValidationReport:
     """
     Valida el TimetableProblem.
     - Si raise_on_error=True y hay errores -> lanza ValidationError.
     - Si no, devuelve ValidationReport con errores y warnings.
+    - Si fail_fast=True, se detiene tras la primera fase que produzca errores
+      (útil cuando solo interesa saber si el problema es válido).
     """
     errors: List[str] = []
     warnings: List[str] = []
-
-    _validate_calendar(problem.calendar, errors, warnings)
-    _validate_uniqueness(problem, errors)
-    _validate_entities(problem, errors, warnings)
-    _validate_requirements(problem, errors, warnings)
-    _validate_capacity_sanity(problem, errors, warnings)
+    ctx = _Ctx.build(problem)
+
+    phases = (
+        lambda: _validate_calendar(ctx, problem.calendar, errors, warnings),
+        lambda: _validate_uniqueness(problem, errors),
+        lambda: _validate_entities(ctx, problem, errors, warnings),
+        lambda: _validate_requirements(ctx, problem, errors, warnings),
+        lambda: _validate_capacity_sanity(ctx, problem, errors, warnings),
+    )
+    for run_phase in phases:
+        run_phase()
+        if fail_fast and errors:
+            break
 
     report = ValidationReport(ok=(len(errors) == 0), errors=errors, warnings=warnings)
     if raise_on_error and errors:
@@ -54,92 +73,164 @@ def validate_problem(problem: TimetableProblem, *, raise_on_error: bool = True)
 
 # ------------------ Helpers ------------------
 
-def _validate_calendar(cal: Calendar, errors: List[str], warnings: List[str]) -> None:
+@dataclass(frozen=True, slots=True)
+class _Ctx:
+    """Datos derivados del problema, calculados una vez y compartidos por los validadores."""
+    groups: Dict[str, Group]
+    subjects: Dict[str, Subject]
+    teachers: Dict[str, Teacher]
+    calendar: Calendar
+    days: FrozenSet[str]
+    teaching_slots: Tuple[Slot, ...]
+    # Máscaras sobre Calendar.slot_bit: los slots lectivos y, por profesor, los lectivos
+    # en que está disponible.
+    teaching_mask: int
+    avail: Dict[str, int]
+    # subject_id -> ids de profesores que la pueden impartir (pool por defecto de CHOOSE)
+    teachers_by_subject: Dict[str, Tuple[str, ...]]
+    # tipo de aula -> mayor capacidad disponible de ese tipo
+    max_room_capacity: Dict[RoomType, int]
+    # forbidden_mask -> máscara de slots lectivos permitidos (se repiten mucho entre requisitos)
+    _allowed_by_forbidden: Dict[int, int] = field(default_factory=dict)
+    # Cargas semanales por grupo y por profesor FIXED; las rellena _validate_requirements.
+    load_by_group: Dict[str, int] = field(default_factory=lambda: defaultdict(int))
+    fixed_load: Dict[str, int] = field(default_factory=lambda: defaultdict(int))
+
+    @classmethod
+    def build(cls, problem: TimetableProblem) -> "_Ctx":
+        teachers = problem.index_teachers()
+        teaching_slots = problem.calendar.teaching_slots()
+        teaching_mask = problem.calendar.slots_mask(teaching_slots)
+        unavailable = problem.teacher_unavailable_masks()
+        by_subject: Dict[str, List[str]] = defaultdict(list)
+        for t in problem.teachers:
+            for sub_id in t.can_teach:
+                by_subject[sub_id].append(t.id)
+        max_cap: Dict[RoomType, int] = {}
+        for r in problem.rooms:
+            cap = max_cap.get(r.type)
+            if cap is None or r.capacity > cap:
+                max_cap[r.type] = r.capacity
+        return cls(
+            groups=problem.index_groups(),
+            subjects=problem.index_subjects(),
+            teachers=teachers,
+            calendar=problem.calendar,
+            days=frozenset(problem.calendar.days),
+            teaching_slots=teaching_slots,
+            teaching_mask=teaching_mask,
+            avail={tid: teaching_mask & ~unavailable[tid] for tid in teachers},
+            teachers_by_subject={sub_id: tuple(ids) for sub_id, ids in by_subject.items()},
+            max_room_capacity=max_cap,
+        )
+
+    def allowed_periods_mask(self, forbidden_mask: int) -> int:
+        mask = self._allowed_by_forbidden.get(forbidden_mask)
+        if mask is None:
+            mask = self.calendar.slots_mask(
+                s for s in self.teaching_slots if not (forbidden_mask >> s.period) & 1
+            )
+            self._allowed_by_forbidden[forbidden_mask] = mask
+        return mask
+
+    def teacher_pool(self, req: CourseRequirement) -> Tuple[str, ...]:
+        if req.teacher_pool:
+            return tuple(req.teacher_pool)
+        return self.teachers_by_subject.get(req.subject_id, ())
+
+
+def _has_slots_outside(cal: Calendar, slots: FrozenSet[Slot]) -> bool:
+    return bool(slots) and cal.slots_mask(slots).bit_count() < len(slots)
+
+
+def _validate_calendar(ctx: _Ctx, cal: Calendar, errors: List[str], warnings: List[str]) -> None:
+    add_error = errors.append
+    add_warning = warnings.append
     if not cal.days:
-        errors.append("Calendar.days está vacío.")
+        add_error("Calendar.days está vacío.")
         return
 
+    days = ctx.days
     if cal.periods_per_day <= 0:
-        errors.append(f"Calendar.periods_per_day debe ser > 0 (actual: {cal.periods_per_day}).")
-
-    for s in cal.blocked_slots:
-        if s.day not in cal.days:
-            errors.append(f"blocked_slot {s} usa un day '{s.day}' que no está en Calendar.days.")
-        if s.period < 1 or s.period > cal.periods_per_day:
-            errors.append(f"blocked_slot {s} usa period {s.period} fuera de 1..{cal.periods_per_day}.")
+        add_error(f"Calendar.periods_per_day debe ser > 0 (actual: {cal.periods_per_day}).")
+
+    # slots_mask ignora los slots fuera del calendario: si tiene menos bits que slots,
+    # alguno cae fuera y solo entonces se recorren para clasificar el error.
+    if _has_slots_outside(cal, cal.blocked_slots):
+        for s in cal.blocked_slots:
+            if s.day not in days:
+                add_error(f"blocked_slot {s} usa un day '{s.day}' que no está en Calendar.days.")
+            if s.period < 1 or s.period > cal.periods_per_day:
+                add_error(f"blocked_slot {s} usa period {s.period} fuera de 1..{cal.periods_per_day}.")
 
     if cal.periods_per_day > 12:
-        warnings.append(
+        add_warning(
             f"Calendar.periods_per_day={cal.periods_per_day} es alto; revisa si realmente son periodos lectivos."
         )
 
-    if len(cal.teaching_slots()) == 0:
-        errors.append("No hay slots lectivos disponibles: todos los slots están bloqueados.")
+    if len(ctx.teaching_slots) == 0:
+        add_error("No hay slots lectivos disponibles: todos los slots están bloqueados.")
 
 
 def _validate_uniqueness(problem: TimetableProblem, errors: List[str]) -> None:
-    def dupes(ids: List[str]) -> Set[str]:
-        seen: Set[str] = set()
-        d: Set[str] = set()
-        for x in ids:
-            if x in seen:
-                d.add(x)
-            seen.add(x)
-        return d
-
-    g_dupes = dupes([g.id for g in problem.groups])
-    s_dupes = dupes([s.id for s in problem.subjects])
-    t_dupes = dupes([t.id for t in problem.teachers])
-    r_dupes = dupes([r.id for r in problem.rooms])
+    def dupes(ids: Iterable[str]) -> List[str]:
+        return sorted(x for x, n in Counter(ids).items() if n > 1)
+
+    g_dupes = dupes(g.id for g in problem.groups)
+    s_dupes = dupes(s.id for s in problem.subjects)
+    t_dupes = dupes(t.id for t in problem.teachers)
+    r_dupes = dupes(r.id for r in problem.rooms)
 
     if g_dupes:
-        errors.append(f"IDs de grupos duplicados: {sorted(g_dupes)}")
+        errors.append(f"IDs de grupos duplicados: {g_dupes}")
     if s_dupes:
-        errors.append(f"IDs de asignaturas duplicados: {sorted(s_dupes)}")
+        errors.append(f"IDs de asignaturas duplicados: {s_dupes}")
     if t_dupes:
-        errors.append(f"IDs de profesores duplicados: {sorted(t_dupes)}")
+        errors.append(f"IDs de profesores duplicados: {t_dupes}")
     if r_dupes:
-        errors.append(f"IDs de aulas duplicados: {sorted(r_dupes)}")
+        errors.append(f"IDs de aulas duplicados: {r_dupes}")
 
 
-def _validate_entities(problem: TimetableProblem, errors: List[str], warnings: List[str]) -> None:
+def _validate_entities(ctx: _Ctx, problem: TimetableProblem, errors: List[str], warnings: List[str]) -> None:
+    add_error = errors.append
+    add_warning = warnings.append
     cal = problem.calendar
-    groups = problem.index_groups()
-    subjects = problem.index_subjects()
-    teachers = problem.index_teachers()
+    subjects = ctx.subjects
+    days = ctx.days
 
     # Groups
     for g in problem.groups:
         if not g.id.strip():
-            errors.append("Existe un Group con id vacío.")
+            add_error("Existe un Group con id vacío.")
         if g.size <= 0:
-            errors.append(f"Group '{g.id}' tiene size <= 0 (actual: {g.size}).")
+            add_error(f"Group '{g.id}' tiene size <= 0 (actual: {g.size}).")
 
     # Subjects
     for sub in problem.subjects:
         if not sub.id.strip():
-            errors.append("Existe un Subject con id vacío.")
+            add_error("Existe un Subject con id vacío.")
         if sub.max_per_day is not None and sub.max_per_day <= 0:
-            errors.append(f"Subject '{sub.id}': max_per_day debe ser > 0 o None.")
+            add_error(f"Subject '{sub.id}': max_per_day debe ser > 0 o None.")
         if sub.max_per_day is not None and sub.max_per_day > cal.periods_per_day:
-            warnings.append(
+            add_warning(
                 f"Subject '{sub.id}': max_per_day={sub.max_per_day} > periods_per_day={cal.periods_per_day}."
             )
 
     # Teachers
     for t in problem.teachers:
         if not t.id.strip():
-            errors.append("Existe un Teacher con id vacío.")
+            add_error("Existe un Teacher con id vacío.")
         for sub_id in t.can_teach:
             if sub_id not in subjects:
-                errors.append(f"Teacher '{t.id}' can_teach incluye subject_id desconocido '{sub_id}'.")
-        for s in t.unavailable:
-            if s.day not in cal.days:
-                errors.append(f"Teacher '{t.id}' tiene unavailable {s} con day fuera de Calendar.days.")
-            if s.period < 1 or s.period > cal.periods_per_day:
-                errors.append(
-                    f"Teacher '{t.id}' tiene unavailable {s} con period fuera de 1..{cal.periods_per_day}."
-                )
+                add_error(f"Teacher '{t.id}' can_teach incluye subject_id desconocido '{sub_id}'.")
+        if _has_slots_outside(cal, t.unavailable):
+            for s in t.unavailable:
+                if s.day not in days:
+                    add_error(f"Teacher '{t.id}' tiene unavailable {s} con day fuera de Calendar.days.")
+                if s.period < 1 or s.period > cal.periods_per_day:
+                    add_error(
+                        f"Teacher '{t.id}' tiene unavailable {s} con period fuera de 1..{cal.periods_per_day}."
+                    )
 
         _validate_min_max_pair(
             f"Teacher '{t.id}'",
@@ -155,23 +246,24 @@ def _validate_entities(problem: TimetableProblem, errors: List[str], warnings: L
         )
 
         if t.max_periods_per_day is not None and t.max_periods_per_day > cal.periods_per_day:
-            warnings.append(
+            add_warning(
                 f"Teacher '{t.id}': max_periods_per_day={t.max_periods_per_day} > periods_per_day={cal.periods_per_day}."
             )
 
     # Rooms
     for r in problem.rooms:
         if not r.id.strip():
-            errors.append("Existe un Room con id vacío.")
+            add_error("Existe un Room con id vacío.")
         if r.capacity <= 0:
-            errors.append(f"Room '{r.id}' tiene capacity <= 0 (actual: {r.capacity}).")
-        for s in r.unavailable:
-            if s.day not in cal.days:
-                errors.append(f"Room '{r.id}' tiene unavailable {s} con day fuera de Calendar.days.")
-            if s.period < 1 or s.period > cal.periods_per_day:
-                errors.append(
-                    f"Room '{r.id}' tiene unavailable {s} con period fuera de 1..{cal.periods_per_day}."
-                )
+            add_error(f"Room '{r.id}' tiene capacity <= 0 (actual: {r.capacity}).")
+        if _has_slots_outside(cal, r.unavailable):
+            for s in r.unavailable:
+                if s.day not in days:
+                    add_error(f"Room '{r.id}' tiene unavailable {s} con day fuera de Calendar.days.")
+                if s.period < 1 or s.period > cal.periods_per_day:
+                    add_error(
+                        f"Room '{r.id}' tiene unavailable {s} con period fuera de 1..{cal.periods_per_day}."
+                    )
 
 
 def _validate_min_max_pair(
@@ -188,219 +280,243 @@ def _validate_min_max_pair(
         errors.append(f"{ctx}: {min_name} ({min_val}) > {max_name} ({max_val}).")
 
 
-def _validate_requirements(problem: TimetableProblem, errors: List[str], warnings: List[str]) -> None:
+def _validate_requirements(ctx: _Ctx, problem: TimetableProblem, errors: List[str], warnings: List[str]) -> None:
+    # Una sola pasada: además de validar cada requisito, cuenta claves duplicadas y acumula
+    # las cargas que luego revisa _validate_capacity_sanity.
+    req_errors: List[str] = []
+    add_error = req_errors.append
+    add_warning = warnings.append
     cal = problem.calendar
-    groups = problem.index_groups()
-    subjects = problem.index_subjects()
-    teachers = problem.index_teachers()
+    groups = ctx.groups
+    subjects = ctx.subjects
+    teachers = ctx.teachers
+    load_by_group = ctx.load_by_group
+    fixed_load = ctx.fixed_load
+    key_counts: Counter[Tuple[str, str]] = Counter()
 
-    seen_keys: Set[Tuple[str, str]] = set()
     for req in problem.requirements:
-        key = (req.group_id, req.subject_id)
-        if key in seen_keys:
-            errors.append(
-                f"CourseRequirement duplicado para group='{req.group_id}', subject='{req.subject_id}'. "
-                "Combínalos en uno (sumando periods_per_week) o usa un id extra si realmente son distintos."
-            )
-        seen_keys.add(key)
+        key_counts[(req.group_id, req.subject_id)] += 1
+        load_by_group[req.group_id] += req.periods_per_week
+        if req.teacher_policy == TeacherPolicy.FIXED and req.teacher_id:
+            fixed_load[req.teacher_id] += req.periods_per_week
 
-    for req in problem.requirements:
+        pool: Optional[Tuple[str, ...]] = None
         if req.group_id not in groups:
-            errors.append(f"Requirement referencia group_id desconocido '{req.group_id}'.")
+            add_error(f"Requirement referencia group_id desconocido '{req.group_id}'.")
             continue
         if req.subject_id not in subjects:
-            errors.append(f"Requirement referencia subject_id desconocido '{req.subject_id}'.")
+            add_error(f"Requirement referencia subject_id desconocido '{req.subject_id}'.")
             continue
 
         if req.periods_per_week <= 0:
-            errors.append(
+            add_error(
                 f"Requirement (group={req.group_id}, subject={req.subject_id}): "
                 f"periods_per_week debe ser > 0 (actual: {req.periods_per_week})."
             )
 
         if req.max_consecutive is not None:
             if req.max_consecutive <= 0:
-                errors.append(
+                add_error(
                     f"Requirement (group={req.group_id}, subject={req.subject_id}): "
                     f"max_consecutive debe ser > 0 o None (actual: {req.max_consecutive})."
                 )
             if req.max_consecutive > cal.periods_per_day:
-                warnings.append(
+                add_warning(
                     f"Requirement (group={req.group_id}, subject={req.subject_id}): "
                     f"max_consecutive={req.max_consecutive} > periods_per_day={cal.periods_per_day}."
                 )
 
         _validate_period_set(
-            ctx=f"Requirement (group={req.group_id}, subject={req.subject_id}) preferred_periods",
+            req=req,
+            field_name="preferred_periods",
             periods=req.preferred_periods,
             max_period=cal.periods_per_day,
-            errors=errors,
+            errors=req_errors,
             warnings=warnings,
             allow_empty=False,
         )
         _validate_period_set(
-            ctx=f"Requirement (group={req.group_id}, subject={req.subject_id}) forbidden_periods",
+            req=req,
+            field_name="forbidden_periods",
             periods=req.forbidden_periods,
             max_period=cal.periods_per_day,
-            errors=errors,
+            errors=req_errors,
             warnings=warnings,
             allow_empty=True,
         )
 
         if req.teacher_policy == TeacherPolicy.FIXED:
             if not req.teacher_id:
-                errors.append(
+                add_error(
                     f"Requirement (group={req.group_id}, subject={req.subject_id}): "
                     "teacher_policy=FIXED pero teacher_id es None/vacío."
                 )
             elif req.teacher_id not in teachers:
-                errors.append(
+                add_error(
                     f"Requirement (group={req.group_id}, subject={req.subject_id}): "
                     f"teacher_id '{req.teacher_id}' no existe."
                 )
             else:
                 t = teachers[req.teacher_id]
                 if req.subject_id not in t.can_teach:
-                    errors.append(
+                    add_error(
                         f"Requirement (group={req.group_id}, subject={req.subject_id}): "
                         f"Teacher '{t.id}' no puede enseñar '{req.subject_id}' (no está en can_teach)."
                     )
 
         elif req.teacher_policy == TeacherPolicy.CHOOSE:
-            pool = list(req.teacher_pool) if req.teacher_pool else [
-                t.id for t in problem.teachers if req.subject_id in t.can_teach
-            ]
+            pool = ctx.teacher_pool(req)
             if not pool:
-                errors.append(
+                add_error(
                     f"Requirement (group={req.group_id}, subject={req.subject_id}): "
                     "teacher_policy=CHOOSE pero el pool de profesores queda vacío."
                 )
             else:
                 for tid in pool:
                     if tid not in teachers:
-                        errors.append(
+                        add_error(
                             f"Requirement (group={req.group_id}, subject={req.subject_id}): "
                             f"teacher_pool contiene teacher_id desconocido '{tid}'."
                         )
                         continue
                     if req.subject_id not in teachers[tid].can_teach:
-                        errors.append(
+                        add_error(
                             f"Requirement (group={req.group_id}, subject={req.subject_id}): "
                             f"teacher_pool incluye '{tid}' que no puede enseñar '{req.subject_id}'."
                         )
         else:
-            errors.append(
+            add_error(
                 f"Requirement (group={req.group_id}, subject={req.subject_id}): teacher_policy desconocida {req.teacher_policy}."
             )
 
         sub = subjects[req.subject_id]
         g = groups[req.group_id]
-        rooms_ok = [
-            r for r in problem.rooms
-            if (r.type == sub.room_type_required and r.capacity >= g.size)
-        ]
-        if not rooms_ok:
-            errors.append(
+        max_cap = ctx.max_room_capacity.get(sub.room_type_required)
+        if max_cap is None or max_cap < g.size:
+            add_error(
                 f"Requirement (group={req.group_id}, subject={req.subject_id}): "
                 f"no hay Room compatible (type={sub.room_type_required}, capacity>={g.size})."
             )
 
-        possible_slots = _possible_slots_for_requirement(problem, req)
-        if req.periods_per_week > len(possible_slots):
-            errors.append(
+        n_possible = _count_possible_slots(ctx, problem, req, pool)
+        if req.periods_per_week > n_possible:
+            add_error(
                 f"Requirement (group={req.group_id}, subject={req.subject_id}): "
-                f"pide {req.periods_per_week} sesiones/semana pero solo hay {len(possible_slots)} slots posibles "
+                f"pide {req.periods_per_week} sesiones/semana pero solo hay {n_possible} slots posibles "
                 f"según bloqueos/forbidden/availability."
             )
 
+    # Los duplicados se reportan antes que los errores por requisito: un error por cada copia
+    # extra, agrupados por clave en orden de primera aparición.
+    for (g_id, s_id), n in key_counts.items():
+        for _ in range(n - 1):
+            errors.append(
+                f"CourseRequirement duplicado para group='{g_id}', subject='{s_id}'. "
+                "Combínalos en uno (sumando periods_per_week) o usa un id extra si realmente son distintos."
+            )
+    errors.extend(req_errors)
+
 
 def _validate_period_set(
     *,
-    ctx: str,
-    periods: Optional[Set[int]],
+    req: CourseRequirement,
+    field_name: str,
+    periods: Optional[FrozenSet[int]],
     max_period: int,
     errors: List[str],
     warnings: List[str],
     allow_empty: bool,
 ) -> None:
+    # El prefijo del mensaje solo se formatea si hay algo que reportar.
     if periods is None:
         return
-    if not periods and not allow_empty:
-        warnings.append(f"{ctx}: conjunto vacío (¿seguro que quieres esto?).")
+    if not periods:
+        if not allow_empty:
+            ctx = f"Requirement (group={req.group_id}, subject={req.subject_id}) {field_name}"
+            warnings.append(f"{ctx}: conjunto vacío (¿seguro que quieres esto?).")
+        return
+    # Caso habitual: todos dentro de rango, basta con mirar los extremos.
+    if min(periods) >= 1 and max(periods) <= max_period:
+        return
     bad = [p for p in periods if p < 1 or p > max_period]
     if bad:
+        ctx = f"Requirement (group={req.group_id}, subject={req.subject_id}) {field_name}"
         errors.append(f"{ctx}: contiene periodos fuera de 1..{max_period}: {sorted(bad)}.")
 
 
-def _possible_slots_for_requirement(problem: TimetableProblem, req: CourseRequirement) -> List[Slot]:
-    cal = problem.calendar
-    slots = list(cal.teaching_slots())
+def _count_possible_slots(
+    ctx: _Ctx,
+    problem: TimetableProblem,
+    req: CourseRequirement,
+    pool: Optional[Tuple[str, ...]] = None,
+) -> int:
+    return _possible_slots_mask(ctx, problem, req, pool).bit_count()
+
+
+def _possible_slots_mask(
+    ctx: _Ctx,
+    problem: TimetableProblem,
+    req: CourseRequirement,
+    pool: Optional[Tuple[str, ...]] = None,
+) -> int:
+    mask = ctx.teaching_mask
 
     if problem.config.forbidden_periods_hard and req.forbidden_periods:
-        forb = set(req.forbidden_periods)
-        slots = [s for s in slots if s.period not in forb]
+        mask &= ctx.allowed_periods_mask(req.forbidden_mask)
 
     if req.teacher_policy == TeacherPolicy.FIXED and req.teacher_id:
-        t = problem.index_teachers().get(req.teacher_id)
-        if t:
-            slots = [s for s in slots if t.is_available(s)]
-        return slots
+        avail = ctx.avail.get(req.teacher_id)
+        if avail is not None:
+            mask &= avail
+        return mask
 
     if req.teacher_policy == TeacherPolicy.CHOOSE:
-        teachers = problem.index_teachers()
-        pool = list(req.teacher_pool) if req.teacher_pool else [
-            t.id for t in problem.teachers if req.subject_id in t.can_teach
-        ]
-        allowed: List[Slot] = []
-        for s in slots:
-            if any(teachers.get(tid) and teachers[tid].is_available(s) for tid in pool):
-                allowed.append(s)
-        return allowed
-
-    return slots
-
-
-def _validate_capacity_sanity(problem: TimetableProblem, errors: List[str], warnings: List[str]) -> None:
-    cal = problem.calendar
-    teaching_slots = cal.teaching_slots()
-    slots_per_week = len(teaching_slots)
-
-    load_by_group: Dict[str, int] = {}
-    for req in problem.requirements:
-        load_by_group[req.group_id] = load_by_group.get(req.group_id, 0) + req.periods_per_week
-
-    for g_id, load in load_by_group.items():
+        if pool is None:
+            pool = ctx.teacher_pool(req)
+        # Un slot vale si algún profesor (conocido) del pool está disponible.
+        avail = ctx.avail
+        pool_mask = 0
+        for tid in pool:
+            pool_mask |= avail.get(tid, 0)
+            if pool_mask & mask == mask:
+                break  # ya cubre todos los slots posibles; el resto del pool no añade nada
+        return mask & pool_mask
+
+    return mask
+
+
+def _validate_capacity_sanity(ctx: _Ctx, problem: TimetableProblem, errors: List[str], warnings: List[str]) -> None:
+    add_error = errors.append
+    add_warning = warnings.append
+    slots_per_week = len(ctx.teaching_slots)
+
+    for g_id, load in ctx.load_by_group.items():
         if load > slots_per_week:
-            errors.append(
+            add_error(
                 f"Grupo '{g_id}' requiere {load} sesiones/semana pero solo hay {slots_per_week} slots lectivos."
             )
         elif load == slots_per_week:
-            warnings.append(
+            add_warning(
                 f"Grupo '{g_id}' llena el 100% de slots lectivos ({load}/{slots_per_week}). "
                 "Esto suele hacer el problema más duro."
             )
 
-    teachers = problem.index_teachers()
-    fixed_load: Dict[str, int] = {}
-    for req in problem.requirements:
-        if req.teacher_policy == TeacherPolicy.FIXED and req.teacher_id:
-            fixed_load[req.teacher_id] = fixed_load.get(req.teacher_id, 0) + req.periods_per_week
-
-    for t_id, load in fixed_load.items():
+    teachers = ctx.teachers
+    for t_id, load in ctx.fixed_load.items():
         t = teachers.get(t_id)
         if not t:
             continue
-        available = [s for s in teaching_slots if t.is_available(s)]
-        if load > len(available):
-            errors.append(
-                f"Teacher '{t_id}' tiene carga fija {load} pero solo {len(available)} slots disponibles."
+        available = ctx.avail[t_id].bit_count()
+        if load > available:
+            add_error(
+                f"Teacher '{t_id}' tiene carga fija {load} pero solo {available} slots disponibles."
             )
         if t.max_periods_per_week is not None and load > t.max_periods_per_week:
-            errors.append(
+            add_error(
                 f"Teacher '{t_id}': carga fija {load} > max_periods_per_week {t.max_periods_per_week}."
             )
         if t.min_periods_per_week is not None and load < t.min_periods_per_week:
-            warnings.append(
+            add_warning(
                 f"Teacher '{t_id}': carga fija {load} < min_periods_per_week {t.min_periods_per_week} "
                 "(si ese mínimo es hard, esto será imposible)."
             )
@@ -0,0 +1,168 @@
+# solver/compile.py
+from __future__ import annotations
+
+from dataclasses import dataclass, replace
+from functools import lru_cache
+from typing import Dict, List, Tuple
+
+from app.domain.core.schema import (
+    CourseRequirement,
+    Event,
+    Slot,
+    SolveConfig,
+    TeacherKey,
+    TeacherPolicy,
+    TimetableProblem,
+)
+
+
+# -----------------------------
+# Compilación del problema (compartida por solve y local_search)
+# -----------------------------
+
+@dataclass(frozen=True, slots=True)
+class CompiledProblem:
+    events: Tuple[Event, ...]
+    event_req_key: Dict[str, TeacherKey]                 # event_id -> (group, subject)
+    req_by_key: Dict[TeacherKey, CourseRequirement]      # TeacherKey -> CourseRequirement
+    slots: Tuple[Slot, ...]
+    slot_index: Dict[Slot, int]
+    slot_bits: Tuple[int, ...]                           # slot index -> Calendar.slot_bit
+    key_pools: Dict[TeacherKey, Tuple[str, ...]]         # TeacherKey -> teacher_ids pool
+    allowed_slots: Dict[str, Tuple[int, ...]]            # event_id -> slot indices
+    allowed_rooms: Dict[str, Tuple[str, ...]]            # event_id -> room_ids
+
+
+def compile_problem(problem: TimetableProblem) -> CompiledProblem:
+    cal = problem.calendar
+    slots = cal.teaching_slots()
+    slot_index = {s: i for i, s in enumerate(slots)}
+    slot_bits = tuple(cal.slot_bit(s) for s in slots)
+
+    groups = problem.index_groups()
+    subjects = problem.index_subjects()
+    teachers = problem.index_teachers()
+
+    events: List[Event] = []
+    event_req_key: Dict[str, TeacherKey] = {}
+    req_by_key: Dict[TeacherKey, CourseRequirement] = {}
+    key_pools: Dict[TeacherKey, Tuple[str, ...]] = {}
+    allowed_slots: Dict[str, Tuple[int, ...]] = {}
+    allowed_rooms: Dict[str, Tuple[str, ...]] = {}
+
+    def rooms_for(group_id: str, subject_id: str) -> List[str]:
+        g = groups[group_id]
+        sub = subjects[subject_id]
+        return [
+            r.id for r in problem.rooms
+            if r.type == sub.room_type_required and r.capacity >= g.size
+        ]
+
+    def pool_for(req: CourseRequirement) -> Tuple[str, ...]:
+        if req.teacher_policy == TeacherPolicy.FIXED:
+            return (req.teacher_id,) if req.teacher_id else tuple()
+        # CHOOSE
+        if req.teacher_pool:
+            return tuple(req.teacher_pool)
+        return tuple(t.id for t in problem.teachers if req.subject_id in t.can_teach)
+
+    # Dominios como máscaras sobre Calendar.slot_bit; se traducen a índices de slot al final.
+    teacher_unavailable = problem.teacher_unavailable_masks()
+    teaching_mask = cal.slots_mask(slots)
+    allowed_by_forbidden: Dict[int, int] = {}  # forbidden_mask -> máscara de slots permitidos
+
+    def possible_slots_for(req: CourseRequirement, pool: Tuple[str, ...]) -> Tuple[int, ...]:
+        mask = teaching_mask
+
+        # forbidden hard (si aplica)
+        if problem.config.forbidden_periods_hard and req.forbidden_periods:
+            forb = req.forbidden_mask
+            allowed = allowed_by_forbidden.get(forb)
+            if allowed is None:
+                allowed = allowed_by_forbidden[forb] = cal.slots_mask(
+                    s for s in slots if not (forb >> s.period) & 1
+                )
+            mask &= allowed
+
+        if req.teacher_policy == TeacherPolicy.FIXED and req.teacher_id:
+            mask &= ~teacher_unavailable[req.teacher_id]
+
+        elif req.teacher_policy == TeacherPolicy.CHOOSE:
+            # recorta dominio usando unión de disponibilidades del pool (optimización)
+            pool_teachers = [tid for tid in pool if tid in teachers]
+            if pool_teachers:
+                pool_mask = 0
+                for tid in pool_teachers:
+                    pool_mask |= teaching_mask & ~teacher_unavailable[tid]
+                mask &= pool_mask
+
+        return tuple(si for si, bit in enumerate(slot_bits) if (mask >> bit) & 1)
+
+    for req in problem.requirements:
+        k: TeacherKey = (req.group_id, req.subject_id)
+        req_by_key[k] = req
+
+        pool = pool_for(req)
+        key_pools[k] = pool
+
+        sub = subjects[req.subject_id]
+        # aulas y slots dependen solo del requisito: se calculan una vez para todos sus eventos
+        rids = tuple(rooms_for(req.group_id, req.subject_id))
+        poss = possible_slots_for(req, pool)
+
+        # expandir a eventos unitarios
+        for i in range(1, req.periods_per_week + 1):
+            eid = f"{req.group_id}-{req.subject_id}-{i:02d}"
+            e = Event(
+                id=eid,
+                group_id=req.group_id,
+                subject_id=req.subject_id,
+                duration=1,
+                room_type_required=sub.room_type_required,
+                same_teacher_key=k,
+            )
+            events.append(e)
+            event_req_key[eid] = k
+
+            if not rids:
+                raise ValueError(
+                    f"Evento {eid}: no hay aulas compatibles para (group={req.group_id}, subject={req.subject_id})."
+                )
+            allowed_rooms[eid] = rids
+
+            if not poss:
+                raise ValueError(
+                    f"Evento {eid}: no hay slots posibles tras aplicar bloqueos/forbidden/disponibilidad."
+                )
+            allowed_slots[eid] = poss
+
+    return CompiledProblem(
+        events=tuple(events),
+        event_req_key=event_req_key,
+        req_by_key=req_by_key,
+        slots=slots,
+        slot_index=slot_index,
+        slot_bits=slot_bits,
+        key_pools=key_pools,
+        allowed_slots=allowed_slots,
+        allowed_rooms=allowed_rooms,
+    )
+
+
+@lru_cache(maxsize=32)
+def _compile_structural(problem: TimetableProblem) -> CompiledProblem:
+    return compile_problem(problem)
+
+
+def compile_problem_cached(problem: TimetableProblem) -> CompiledProblem:
+    """
+    compile_problem cacheado por la estructura del problema.
+
+    De la config solo influye forbidden_periods_hard: re-resolver cambiando pesos,
+    semilla o tiempo reutiliza la compilación. El resultado es compartido: no mutarlo.
+    """
+    structural = replace(
+        problem,
+        config=SolveConfig(forbidden_periods_hard=problem.config.forbidden_periods_hard),
+    )
+    return _compile_structural(structural)
@@ -0,0 +1,343 @@
+# solver/local_search.py
+from __future__ import annotations
+
+import random
+import time
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from app.domain.core.schema import ScheduledEvent, TeacherKey, TimetableProblem, TimetableSolution
+from app.domain.solver.compile import CompiledProblem, compile_problem_cached
+
+# Componentes de coste: (tipo, índice, slot/día). Cada movimiento solo recalcula los que toca.
+_GROUP, _TEACHER, _ROOMS, _KEY_DAY, _TEACHER_DAY, _TEACHER_WEEK = range(6)
+_Component = Tuple[int, int, int]
+
+# Intentos de muestreo para encontrar un evento en conflicto en cada iteración.
+_PICK_ATTEMPTS = 50
+
+
+def tabu_search(
+    problem: TimetableProblem,
+    max_seconds: float,
+    seed: Optional[int] = None,
+) -> Optional[TimetableSolution]:
+    """
+    Búsqueda tabú sobre (slot de cada evento, profesor de cada key) minimizando las
+    violaciones de restricciones hard; pensada como pista (warm start) para CP-SAT.
+
+    Vecindario: mover un evento a otro slot (intercambiándolo con el evento de su grupo
+    que lo ocupe) o cambiar el profesor de su key. Tabú: volver al valor anterior durante
+    |eventos|/4 iteraciones, salvo que mejore el mejor coste. Las preferencias (huecos,
+    última hora...) se dejan a CP-SAT. Las aulas se asignan al final, slot a slot.
+
+    Devuelve la mejor asignación encontrada (puede no ser factible) o None si el
+    problema no admite una asignación inicial (p.ej. key sin profesores).
+    """
+    c = compile_problem_cached(problem)
+    if not c.events:
+        return None
+    teachers = problem.index_teachers()
+    subjects = problem.index_subjects()
+    cal = problem.calendar
+    rnd = random.Random(seed)
+
+    slots = c.slots
+    n_slots = len(slots)
+    day_index = {d: i for i, d in enumerate(cal.days)}
+    slot_day = [day_index[s.day] for s in slots]
+    # slots de cada día por periodo (None si el periodo no es lectivo)
+    day_slots: List[List[Optional[int]]] = [[None] * cal.periods_per_day for _ in cal.days]
+    for si, s in enumerate(slots):
+        day_slots[day_index[s.day]][s.period - 1] = si
+
+    events = c.events
+    n = len(events)
+    keys: List[TeacherKey] = list(c.req_by_key)
+    key_index = {k: i for i, k in enumerate(keys)}
+    group_index: Dict[str, int] = {}
+    tids = list(teachers)
+    teacher_index = {tid: i for i, tid in enumerate(tids)}
+    room_sets = list(dict.fromkeys(c.allowed_rooms[e.id] for e in events))
+    room_set_index = {rs: i for i, rs in enumerate(room_sets)}
+
+    e_group = [group_index.setdefault(e.group_id, len(group_index)) for e in events]
+    e_key = [key_index[c.event_req_key[e.id]] for e in events]
+    e_rooms = [room_set_index[c.allowed_rooms[e.id]] for e in events]
+    e_allowed = [c.allowed_slots[e.id] for e in events]
+    e_allowed_set = [frozenset(a) for a in e_allowed]
+
+    key_pool = [[teacher_index[tid] for tid in c.key_pools[k] if tid in teacher_index] for k in keys]
+    if not all(key_pool):
+        return None
+    key_events: List[List[int]] = [[] for _ in keys]
+    for i in range(n):
+        key_events[e_key[i]].append(i)
+    key_max_consecutive = [c.req_by_key[k].max_consecutive for k in keys]
+    key_max_per_day = [subjects[k[1]].max_per_day for k in keys]
+
+    teacher_unavailable = problem.teacher_unavailable_masks()
+    room_unavailable = problem.room_unavailable_masks()
+    t_unavailable = [[(teacher_unavailable[tid] >> bit) & 1 for bit in c.slot_bits] for tid in tids]
+    t_max_day = [teachers[tid].max_periods_per_day for tid in tids]
+    t_max_week = [teachers[tid].max_periods_per_week for tid in tids]
+    # aulas libres de cada conjunto permitido por slot
+    room_capacity = [
+        [sum(1 for rid in rs if not (room_unavailable[rid] >> bit) & 1) for bit in c.slot_bits]
+        for rs in room_sets
+    ]
+
+    # --- Asignación inicial: profesor menos cargado del pool; slots libres del grupo
+    key_teacher = [0] * len(keys)
+    load = [0] * len(tids)
+    for ki in sorted(range(len(keys)), key=lambda ki: len(key_pool[ki])):
+        need = len(key_events[ki])
+        t = min(
+            key_pool[ki],
+            key=lambda t: (t_max_week[t] is not None and load[t] + need > t_max_week[t], load[t], rnd.random()),
+        )
+        key_teacher[ki] = t
+        load[t] += need
+
+    slot_of = [0] * n
+    used: Dict[int, Set[int]] = {}
+    for i in sorted(range(n), key=lambda i: len(e_allowed[i])):
+        taken = used.setdefault(e_group[i], set())
+        free = [si for si in e_allowed[i] if si not in taken]
+        slot_of[i] = rnd.choice(free or e_allowed[i])
+        taken.add(slot_of[i])
+
+    # --- Contadores incrementales
+    group_count = [[0] * n_slots for _ in group_index]
+    teacher_count = [[0] * n_slots for _ in tids]
+    rooms_count = [[0] * n_slots for _ in room_sets]
+    key_count = [[0] * n_slots for _ in keys]
+    teacher_day = [[0] * len(cal.days) for _ in tids]
+    teacher_week = [0] * len(tids)
+    at: List[List[List[int]]] = [[[] for _ in range(n_slots)] for _ in group_index]
+
+    def count(i: int, si: int, delta: int) -> None:
+        t = key_teacher[e_key[i]]
+        group_count[e_group[i]][si] += delta
+        teacher_count[t][si] += delta
+        rooms_count[e_rooms[i]][si] += delta
+        key_count[e_key[i]][si] += delta
+        teacher_day[t][slot_day[si]] += delta
+        teacher_week[t] += delta
+
+    for i in range(n):
+        count(i, slot_of[i], 1)
+        at[e_group[i]][slot_of[i]].append(i)
+
+    # --- Coste de cada componente
+    def group_cost(g: int, si: int) -> int:
+        return max(0, group_count[g][si] - 1)
+
+    def teacher_cost(t: int, si: int) -> int:
+        v = teacher_count[t][si]
+        return max(0, v - 1) + (v if t_unavailable[t][si] else 0)
+
+    def rooms_cost(rs: int, si: int) -> int:
+        return max(0, rooms_count[rs][si] - room_capacity[rs][si])
+
+    def key_day_cost(k: int, d: int) -> int:
+        row = key_count[k]
+        occ = [row[si] if si is not None else 0 for si in day_slots[d]]
+        cost = 0
+        m = key_max_consecutive[k]
+        if m is not None and 1 <= m < len(occ):
+            for start in range(len(occ) - m):
+                cost += max(0, sum(occ[start:start + m + 1]) - m)
+        maxpd = key_max_per_day[k]
+        if maxpd is not None:
+            cost += max(0, sum(occ) - maxpd)
+        return cost
+
+    def teacher_day_cost(t: int, d: int) -> int:
+        m = t_max_day[t]
+        return max(0, teacher_day[t][d] - m) if m is not None else 0
+
+    def teacher_week_cost(t: int, _: int) -> int:
+        m = t_max_week[t]
+        return max(0, teacher_week[t] - m) if m is not None else 0
+
+    cost_of: Tuple[Callable[[int, int], int], ...] = (
+        group_cost, teacher_cost, rooms_cost, key_day_cost, teacher_day_cost, teacher_week_cost,
+    )
+
+    def cost(components: Set[_Component]) -> int:
+        return sum(cost_of[kind](a, b) for kind, a, b in components)
+
+    def components_of(i: int, si: int, out: Set[_Component]) -> None:
+        t = key_teacher[e_key[i]]
+        d = slot_day[si]
+        out.add((_GROUP, e_group[i], si))
+        out.add((_TEACHER, t, si))
+        out.add((_ROOMS, e_rooms[i], si))
+        out.add((_KEY_DAY, e_key[i], d))
+        out.add((_TEACHER_DAY, t, d))
+
+    def move(i: int, si: int) -> None:
+        old = slot_of[i]
+        count(i, old, -1)
+        at[e_group[i]][old].remove(i)
+        slot_of[i] = si
+        count(i, si, 1)
+        at[e_group[i]][si].append(i)
+
+    def set_teacher(k: int, t: int) -> None:
+        for i in key_events[k]:
+            count(i, slot_of[i], -1)
+        key_teacher[k] = t
+        for i in key_events[k]:
+            count(i, slot_of[i], 1)
+
+    all_components: Set[_Component] = set()
+    for i in range(n):
+        components_of(i, slot_of[i], all_components)
+    all_components.update((_TEACHER_WEEK, t, 0) for t in range(len(tids)))
+    current = cost(all_components)
+
+    best = current
+    best_slots, best_teachers = slot_of[:], key_teacher[:]
+    tenure = max(1, n // 4)
+    tabu_until: Dict[Tuple[int, int, int], int] = {}  # (0=evento/1=key, índice, valor) -> iteración
+    iteration = 0
+    deadline = time.monotonic() + max_seconds
+
+    while current > 0 and time.monotonic() < deadline:
+        iteration += 1
+
+        # evento en conflicto (muestreado; en el peor caso se explora uno cualquiera)
+        for _ in range(_PICK_ATTEMPTS):
+            i = rnd.randrange(n)
+            touched: Set[_Component] = set()
+            components_of(i, slot_of[i], touched)
+            if cost(touched):
+                break
+
+        si0 = slot_of[i]
+        candidates: List[Tuple[int, float, Tuple[int, int, int, int]]] = []
+
+        # 1) mover i a otro slot; si lo ocupa un único evento del grupo, intercambiarlos
+        for si in e_allowed[i]:
+            if si == si0:
+                continue
+            occupants = at[e_group[i]][si]
+            j = occupants[0] if len(occupants) == 1 and si0 in e_allowed_set[occupants[0]] else -1
+            touched = set()
+            components_of(i, si0, touched)
+            components_of(i, si, touched)
+            if j >= 0:
+                components_of(j, si, touched)
+                components_of(j, si0, touched)
+            before = cost(touched)
+            move(i, si)
+            if j >= 0:
+                move(j, si0)
+            delta = cost(touched) - before
+            if j >= 0:
+                move(j, si)
+            move(i, si0)
+
+            is_tabu = tabu_until.get((0, i, si), 0) > iteration or (
+                j >= 0 and tabu_until.get((0, j, si0), 0) > iteration
+            )
+            if is_tabu and current + delta >= best:
+                continue
+            candidates.append((delta, rnd.random(), (0, i, si, j)))
+
+        # 2) cambiar el profesor de la key de i
+        k = e_key[i]
+        t0 = key_teacher[k]
+        for t in key_pool[k]:
+            if t == t0:
+                continue
+            touched = {(_TEACHER_WEEK, t0, 0), (_TEACHER_WEEK, t, 0)}
+            for ei in key_events[k]:
+                components_of(ei, slot_of[ei], touched)
+                touched.add((_TEACHER, t, slot_of[ei]))
+                touched.add((_TEACHER_DAY, t, slot_day[slot_of[ei]]))
+            before = cost(touched)
+            set_teacher(k, t)
+            delta = cost(touched) - before
+            set_teacher(k, t0)
+
+            if tabu_until.get((1, k, t), 0) > iteration and current + delta >= best:
+                continue
+            candidates.append((delta, rnd.random(), (1, k, t, -1)))
+
+        if not candidates:
+            continue
+
+        delta, _, (kind, a, b, j) = min(candidates)
+        if kind == 0:
+            tabu_until[(0, a, si0)] = iteration + tenure
+            move(a, b)
+            if j >= 0:
+                tabu_until[(0, j, b)] = iteration + tenure
+                move(j, si0)
+        else:
+            tabu_until[(1, a, t0)] = iteration + tenure
+            set_teacher(a, b)
+
+        current += delta
+        if current < best:
+            best = current
+            best_slots, best_teachers = slot_of[:], key_teacher[:]
+
+    return _build_solution(problem, c, keys, tids, best_slots, best_teachers, best)
+
+
+def _build_solution(
+    problem: TimetableProblem,
+    c: CompiledProblem,
+    keys: List[TeacherKey],
+    tids: List[str],
+    slot_of: List[int],
+    key_teacher: List[int],
+    violations: int,
+) -> TimetableSolution:
+    room_unavailable = problem.room_unavailable_masks()
+    events = c.events
+    event_pos = {e.id: i for i, e in enumerate(events)}
+
+    # Aulas: emparejamiento por caminos aumentantes entre los eventos de cada slot.
+    by_slot: Dict[int, List[int]] = {}
+    for i, si in enumerate(slot_of):
+        by_slot.setdefault(si, []).append(i)
+    room_of: Dict[int, str] = {}
+    for si, slot_events in by_slot.items():
+        bit = c.slot_bits[si]
+        owner: Dict[str, int] = {}
+
+        def assign(i: int, seen: Set[str]) -> bool:
+            for rid in c.allowed_rooms[events[i].id]:
+                if rid in seen or (room_unavailable[rid] >> bit) & 1:
+                    continue
+                seen.add(rid)
+                if rid not in owner or assign(owner[rid], seen):
+                    owner[rid] = i
+                    return True
+            return False
+
+        for i in slot_events:
+            assign(i, set())
+        for rid, i in owner.items():
+            room_of[i] = rid
+
+    # solve() exige slots crecientes por id dentro de cada key: se reparten ordenados.
+    events_of_key: Dict[TeacherKey, List[int]] = {}
+    for e in events:
+        events_of_key.setdefault(c.event_req_key[e.id], []).append(event_pos[e.id])
+    scheduled: List[ScheduledEvent] = []
+    for idx in events_of_key.values():
+        placed = sorted((slot_of[i], room_of.get(i, c.allowed_rooms[events[i].id][0])) for i in idx)
+        for i, (si, rid) in zip(sorted(idx, key=lambda i: events[i].id), placed):
+            scheduled.append(ScheduledEvent(event_id=events[i].id, slot=c.slots[si], room_id=rid))
+
+    return TimetableSolution(
+        scheduled=tuple(scheduled),
+        teacher_assignment={k: tids[key_teacher[ki]] for ki, k in enumerate(keys)},
+        objective_value=None,
+        objective_breakdown={"hard_violations": violations},
+    )
@@ -1,151 +1,73 @@
 # solver/solve.py
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import Dict, List, Tuple
+import logging
+import os
+from typing import Dict, List, Optional, Tuple
 
 from ortools.sat.python import cp_model
 
 from app.domain.core.schema import (
-    CourseRequirement,
     TimetableProblem,
     TimetableSolution,
     ScheduledEvent,
-    Slot,
     Event,
     TeacherKey,
     TeacherPolicy,
 )
+from app.domain.solver.compile import CompiledProblem, compile_problem_cached
 
+logger = logging.getLogger(__name__)
 
-# -----------------------------
-# Compilación mínima interna
-# -----------------------------
-
-@dataclass(frozen=True)
-class _Compiled:
-    events: Tuple[Event, ...]
-    event_req_key: Dict[str, TeacherKey]                 # event_id -> (group, subject)
-    req_by_key: Dict[TeacherKey, CourseRequirement]      # TeacherKey -> CourseRequirement
-    slots: Tuple[Slot, ...]
-    slot_index: Dict[Slot, int]
-    key_pools: Dict[TeacherKey, Tuple[str, ...]]         # TeacherKey -> teacher_ids pool
-    allowed_slots: Dict[str, Tuple[int, ...]]            # event_id -> slot indices
-    allowed_rooms: Dict[str, Tuple[str, ...]]            # event_id -> room_ids
-
-
-def _compile_problem(problem: TimetableProblem) -> _Compiled:
-    cal = problem.calendar
-    slots = cal.teaching_slots()
-    slot_index = {s: i for i, s in enumerate(slots)}
-
-    groups = problem.index_groups()
-    subjects = problem.index_subjects()
-    teachers = problem.index_teachers()
+# Tope de workers por defecto: a partir de ~8-16 la búsqueda en portfolio apenas escala.
+_MAX_DEFAULT_WORKERS = 16
 
-    events: List[Event] = []
-    event_req_key: Dict[str, TeacherKey] = {}
-    req_by_key: Dict[TeacherKey, CourseRequirement] = {}
-    key_pools: Dict[TeacherKey, Tuple[str, ...]] = {}
-    allowed_slots: Dict[str, Tuple[int, ...]] = {}
-    allowed_rooms: Dict[str, Tuple[str, ...]] = {}
-
-    def rooms_for(group_id: str, subject_id: str) -> List[str]:
-        g = groups[group_id]
-        sub = subjects[subject_id]
-        return [
-            r.id for r in problem.rooms
-            if r.type == sub.room_type_required and r.capacity >= g.size
-        ]
 
-    def pool_for(req: CourseRequirement) -> Tuple[str, ...]:
-        if req.teacher_policy == TeacherPolicy.FIXED:
-            return (req.teacher_id,) if req.teacher_id else tuple()
-        # CHOOSE
-        if req.teacher_pool:
-            return tuple(req.teacher_pool)
-        return tuple(t.id for t in problem.teachers if req.subject_id in t.can_teach)
-
-    def possible_slots_for(req: CourseRequirement, pool: Tuple[str, ...]) -> List[Slot]:
-        possible = list(slots)
-
-        # forbidden hard (si aplica)
-        if problem.config.forbidden_periods_hard and req.forbidden_periods:
-            forb = set(req.forbidden_periods)
-            possible = [s for s in possible if s.period not in forb]
-
-        if req.teacher_policy == TeacherPolicy.FIXED and req.teacher_id:
-            t = teachers[req.teacher_id]
-            possible = [s for s in possible if t.is_available(s)]
-            return possible
-
-        if req.teacher_policy == TeacherPolicy.CHOOSE:
-            # recorta dominio usando unión de disponibilidades del pool (optimización)
-            pool_teachers = [teachers[tid] for tid in pool if tid in teachers]
-            if pool_teachers:
-                possible = [s for s in possible if any(t.is_available(s) for t in pool_teachers)]
-            return possible
-
-        return possible
-
-    for req in problem.requirements:
-        k: TeacherKey = (req.group_id, req.subject_id)
-        req_by_key[k] = req
-
-        pool = pool_for(req)
-        key_pools[k] = pool
-
-        sub = subjects[req.subject_id]
-
-        # expandir a eventos unitarios
-        for i in range(1, req.periods_per_week + 1):
-            eid = f"{req.group_id}-{req.subject_id}-{i:02d}"
-            e = Event(
-                id=eid,
-                group_id=req.group_id,
-                subject_id=req.subject_id,
-                duration=1,
-                room_type_required=sub.room_type_required,
-                same_teacher_key=k,
-            )
-            events.append(e)
-            event_req_key[eid] = k
-
-            rids = tuple(rooms_for(req.group_id, req.subject_id))
-            if not rids:
-                raise ValueError(
-                    f"Evento {eid}: no hay aulas compatibles para (group={req.group_id}, subject={req.subject_id})."
-                )
-            allowed_rooms[eid] = rids
-
-            poss = possible_slots_for(req, pool)
-            if not poss:
-                raise ValueError(
-                    f"Evento {eid}: no hay slots posibles tras aplicar bloqueos/forbidden/disponibilidad."
-                )
-            allowed_slots[eid] = tuple(slot_index[s] for s in poss)
-
-    return _Compiled(
-        events=tuple(events),
-        event_req_key=event_req_key,
-        req_by_key=req_by_key,
-        slots=slots,
-        slot_index=slot_index,
-        key_pools=key_pools,
-        allowed_slots=allowed_slots,
-        allowed_rooms=allowed_rooms,
-    )
+def _num_workers(requested: Optional[int]) -> int:
+    if requested is not None and requested > 0:
+        return requested
+    return min(_MAX_DEFAULT_WORKERS, os.cpu_count() or 8)
 
 
 # -----------------------------
 # Solver CP-SAT
 # -----------------------------
 
-def solve(problem: TimetableProblem) -> TimetableSolution:
-    c = _compile_problem(problem)
+def _add_solution_hint(
+    model: cp_model.CpModel,
+    c: CompiledProblem,
+    hint: TimetableSolution,
+    *,
+    x: Dict[Tuple[str, int], cp_model.IntVar],
+    y: Dict[Tuple[str, str], cp_model.IntVar],
+    a: Dict[Tuple[TeacherKey, str], cp_model.IntVar],
+) -> None:
+    # Pista completa sobre x/y/a (1 lo elegido, 0 el resto): con solo los 1 CP-SAT no
+    # reconstruye la solución previa. Eventos o keys que ya no existen se ignoran.
+    chosen_slot = {se.event_id: c.slot_index.get(se.slot) for se in hint.scheduled}
+    chosen_room = {se.event_id: se.room_id for se in hint.scheduled}
+    for (k, tid), v in a.items():
+        if k in hint.teacher_assignment:
+            model.AddHint(v, hint.teacher_assignment[k] == tid)
+    for (eid, si), v in x.items():
+        if eid in chosen_slot:
+            model.AddHint(v, chosen_slot[eid] == si)
+    for (eid, rid), v in y.items():
+        if eid in chosen_room:
+            model.AddHint(v, chosen_room[eid] == rid)
+
+
+def solve(problem: TimetableProblem, hint: Optional[TimetableSolution] = None) -> TimetableSolution:
+    """
+    Resuelve el problema con CP-SAT.
+
+    hint: solución previa (p.ej. la última de un proyecto) usada como pista de búsqueda.
+    Solo se aplica a eventos/slots/aulas/profesores que siguen existiendo; CP-SAT repara
+    lo que ya no sea factible tras una edición.
+    """
+    c = compile_problem_cached(problem)
     cal = problem.calendar
     teachers = problem.index_teachers()
-    rooms = problem.index_rooms()
     weights = problem.config.weights
 
     model = cp_model.CpModel()
@@ -158,18 +80,24 @@ def solve(problem: TimetableProblem) -> TimetableSolution:
 
     # Cada evento exactamente 1 vez
     for e in c.events:
-        model.Add(sum(x[(e.id, si)] for si in c.allowed_slots[e.id]) == 1)
+        model.AddExactlyOne([x[(e.id, si)] for si in c.allowed_slots[e.id]])
 
     # --- Conflicto de grupo: a lo sumo 1 evento por grupo y slot
     events_by_group: Dict[str, List[Event]] = {}
     for e in c.events:
         events_by_group.setdefault(e.group_id, []).append(e)
 
+    # Términos agrupados por índice de slot en una sola pasada (lista densa por slot),
+    # en vez de probar (evento, slot) para cada slot del calendario.
+    n_slots = len(c.slots)
     for g_id, evs in events_by_group.items():
-        for si in range(len(c.slots)):
-            terms = [x[(e.id, si)] for e in evs if (e.id, si) in x]
+        by_slot: List[List[cp_model.IntVar]] = [[] for _ in range(n_slots)]
+        for e in evs:
+            for si in c.allowed_slots[e.id]:
+                by_slot[si].append(x[(e.id, si)])
+        for terms in by_slot:
             if terms:
-                model.Add(sum(terms) <= 1)
+                model.AddAtMostOne(terms)
 
     # --- Asignación de profesor por TeacherKey: a[k,tid]
     a: Dict[Tuple[TeacherKey, str], cp_model.IntVar] = {}
@@ -180,7 +108,7 @@ def solve(problem: TimetableProblem) -> TimetableSolution:
             raise ValueError(f"Pool vacío para {k}. Revisa validate/problem data.")
         for tid in pool:
             a[(k, tid)] = model.NewBoolVar(f"a[{k[0]},{k[1]},{tid}]")
-        model.Add(sum(a[(k, tid)] for tid in pool) == 1)
+        model.AddExactlyOne([a[(k, tid)] for tid in pool])
 
         req = c.req_by_key[k]
         if req.teacher_policy == TeacherPolicy.FIXED:
@@ -192,67 +120,103 @@ def solve(problem: TimetableProblem) -> TimetableSolution:
                 model.Add(a[(k, tid)] == (1 if tid == fixed else 0))
 
     # --- occ[k,si]: en ese slot hay clase de esa (group,subject)
+    # Solo existe si algún evento de k puede caer en si; si falta, vale 0.
     occ: Dict[Tuple[TeacherKey, int], cp_model.IntVar] = {}
     events_of_key: Dict[TeacherKey, List[Event]] = {}
     for e in c.events:
         events_of_key.setdefault(e.same_teacher_key, []).append(e)
 
     for k, evs in events_of_key.items():
-        for si in range(len(c.slots)):
-            terms = [x[(e.id, si)] for e in evs if (e.id, si) in x]
-            if not terms:
-                occ[(k, si)] = model.NewConstant(0)
-            else:
+        by_slot = [[] for _ in range(n_slots)]
+        for e in evs:
+            for si in c.allowed_slots[e.id]:
+                by_slot[si].append(x[(e.id, si)])
+        for si, terms in enumerate(by_slot):
+            if terms:
                 v = model.NewBoolVar(f"occ[{k[0]},{k[1]},{si}]")
                 # robustez: explícitamente <=1
-                model.Add(sum(terms) <= 1)
+                model.AddAtMostOne(terms)
                 model.Add(v == sum(terms))
                 occ[(k, si)] = v
 
+    # Ruptura de simetría: los eventos de una misma key son intercambiables (mismo dominio)
+    # y no pueden compartir slot, así que se fuerzan en orden creciente de slot.
+    for k, evs in events_of_key.items():
+        if len(evs) < 2:
+            continue
+        slot_of = [
+            sum(si * x[(e.id, si)] for si in c.allowed_slots[e.id])
+            for e in sorted(evs, key=lambda e: e.id)
+        ]
+        for prev, nxt in zip(slot_of, slot_of[1:]):
+            model.Add(prev + 1 <= nxt)
+
+    occ_slots_of_key: Dict[TeacherKey, List[int]] = {}
+    for (k, si) in occ:
+        occ_slots_of_key.setdefault(k, []).append(si)
+
     # --- teach[k,tid,si] para choques de profesor y disponibilidad
-    teach: Dict[Tuple[TeacherKey, str, int], cp_model.IntVar] = {}
+    # Solo donde k puede tener clase (existe occ); si el profesor no está disponible,
+    # teach sería 0: basta con prohibir a[k,tid] AND occ[k,si].
+    # Agrupados por (profesor, slot): son los términos de su conflicto y de busy.
+    teach_at: Dict[Tuple[str, int], List[cp_model.IntVar]] = {}
+    teacher_unavailable = problem.teacher_unavailable_masks()
 
     for k in keys:
         pool = c.key_pools[k]
+        # Literales (y sus negaciones) resueltos una vez por key, no por cada (profesor, slot).
+        key_occ = []
+        for si in occ_slots_of_key.get(k, []):
+            oks = occ[(k, si)]
+            key_occ.append((si, c.slot_bits[si], oks, oks.Not()))
         for tid in pool:
-            t = teachers[tid]
-            for si, slot in enumerate(c.slots):
-                v = model.NewBoolVar(f"teach[{k[0]},{k[1]},{tid},{si}]")
-                teach[(k, tid, si)] = v
-
-                # v = a[k,tid] AND occ[k,si]
-                model.Add(v <= a[(k, tid)])
-                model.Add(v <= occ[(k, si)])
-                model.Add(v >= a[(k, tid)] + occ[(k, si)] - 1)
-
-                # disponibilidad
-                if not t.is_available(slot):
-                    model.Add(v == 0)
+            unavailable = teacher_unavailable[tid]
+            akt = a[(k, tid)]
+            not_akt = akt.Not()
+            for si, bit, oks, not_oks in key_occ:
+                if (unavailable >> bit) & 1:
+                    model.AddBoolOr([not_akt, not_oks])
+                    continue
 
-    # Conflicto profesor: a lo sumo 1 clase por slot
-    busy: Dict[Tuple[str, int], cp_model.IntVar] = {}
-    for tid in teachers.keys():
-        for si in range(len(c.slots)):
-            terms = [teach[(k, tid, si)] for k in keys if (k, tid, si) in teach]
-            if not terms:
-                busy[(tid, si)] = model.NewConstant(0)
-            else:
-                b = model.NewBoolVar(f"busy[{tid},{si}]")
-                model.Add(b == sum(terms))
-                model.Add(sum(terms) <= 1)
-                busy[(tid, si)] = b
+                v = model.NewBoolVar(f"teach[{k[0]},{k[1]},{tid},{si}]")
+                teach_at.setdefault((tid, si), []).append(v)
+
+                # v = a[k,tid] AND occ[k,si] (cláusulas nativas en vez de 3 desigualdades lineales)
+                model.AddBoolAnd([akt, oks]).OnlyEnforceIf(v)
+                model.AddBoolOr([not_akt, not_oks]).OnlyEnforceIf(v.Not())
+
+    # Conflicto profesor: a lo sumo 1 clase por slot.
+    # busy[tid][si] reutiliza el literal teach si es único; con varios se crea un BoolVar
+    # (las restricciones de huecos quedan en 3 literales en vez de sumas largas).
+    # None si no hay ningún teach. Lista densa por slot para cada profesor.
+    busy: Dict[str, List[Optional[cp_model.LinearExprT]]] = {tid: [None] * n_slots for tid in teachers}
+    for (tid, si), terms in teach_at.items():
+        if len(terms) == 1:
+            busy[tid][si] = terms[0]
+        else:
+            model.AddAtMostOne(terms)
+            b = model.NewBoolVar(f"busy[{tid},{si}]")
+            model.Add(b == sum(terms))
+            busy[tid][si] = b
 
     # Límites max_periods_per_day/week (hard)
     slots_by_day: Dict[str, List[int]] = {}
+    slot_by_day_period: Dict[Tuple[str, int], int] = {}
     for si, s in enumerate(c.slots):
         slots_by_day.setdefault(s.day, []).append(si)
+        slot_by_day_period[(s.day, s.period)] = si
 
     for tid, t in teachers.items():
+        t_busy = busy[tid]
         if t.max_periods_per_day is not None:
             for d, silist in slots_by_day.items():
-                model.Add(sum(busy[(tid, si)] for si in silist) <= t.max_periods_per_day)
+                terms = [t_busy[si] for si in silist if t_busy[si] is not None]
+                if terms:
+                    model.Add(sum(terms) <= t.max_periods_per_day)
         if t.max_periods_per_week is not None:
-            model.Add(sum(busy[(tid, si)] for si in range(len(c.slots))) <= t.max_periods_per_week)
+            terms = [b for b in t_busy if b is not None]
+            if terms:
+                model.Add(sum(terms) <= t.max_periods_per_week)
 
     # --- Aulas: y[e,r] y w[e,si,r]
     y: Dict[Tuple[str, str], cp_model.IntVar] = {}
@@ -260,62 +224,62 @@ def solve(problem: TimetableProblem) -> TimetableSolution:
         rids = c.allowed_rooms[e.id]
         for rid in rids:
             y[(e.id, rid)] = model.NewBoolVar(f"y[{e.id},{rid}]")
-        model.Add(sum(y[(e.id, rid)] for rid in rids) == 1)
-
-    # Blindaje CRÍTICO: si un aula no está disponible en ese slot, prohíbe (x=1,y=1)
-    for e in c.events:
-        for si in c.allowed_slots[e.id]:
-            slot = c.slots[si]
-            for rid in c.allowed_rooms[e.id]:
-                if not rooms[rid].is_available(slot):
-                    model.Add(x[(e.id, si)] + y[(e.id, rid)] <= 1)
+        model.AddExactlyOne([y[(e.id, rid)] for rid in rids])
 
-    # w = x AND y (solo combos posibles y disponibles)
-    w: Dict[Tuple[str, int, str], cp_model.IntVar] = {}
+    # w = x AND y (solo combos posibles y disponibles).
+    # Blindaje CRÍTICO: si un aula no está disponible en ese slot, prohíbe (x=1,y=1).
+    # La disponibilidad se consulta en la máscara del aula (bit del slot), sin llamadas por trío.
     room_slot_sum: Dict[Tuple[str, int], List[cp_model.IntVar]] = {}
+    room_unavailable = problem.room_unavailable_masks()
 
     for e in c.events:
+        e_rooms = []
+        for rid in c.allowed_rooms[e.id]:
+            yer = y[(e.id, rid)]
+            e_rooms.append((rid, yer, yer.Not(), room_unavailable[rid]))
         for si in c.allowed_slots[e.id]:
-            slot = c.slots[si]
-            for rid in c.allowed_rooms[e.id]:
-                if not rooms[rid].is_available(slot):
+            bit = c.slot_bits[si]
+            xes = x[(e.id, si)]
+            not_xes = xes.Not()
+            for rid, yer, not_yer, unavailable in e_rooms:
+                if (unavailable >> bit) & 1:
+                    model.AddBoolOr([not_xes, not_yer])
                     continue
 
                 wij = model.NewBoolVar(f"w[{e.id},{si},{rid}]")
-                w[(e.id, si, rid)] = wij
 
-                model.Add(wij <= x[(e.id, si)])
-                model.Add(wij <= y[(e.id, rid)])
-                model.Add(wij >= x[(e.id, si)] + y[(e.id, rid)] - 1)
+                model.AddBoolAnd([xes, yer]).OnlyEnforceIf(wij)
+                model.AddBoolOr([not_xes, not_yer]).OnlyEnforceIf(wij.Not())
 
                 room_slot_sum.setdefault((rid, si), []).append(wij)
 
     # Conflicto aula por slot
-    for rid in rooms.keys():
-        for si in range(len(c.slots)):
-            terms = room_slot_sum.get((rid, si), [])
-            if terms:
-                model.Add(sum(terms) <= 1)
+    for terms in room_slot_sum.values():
+        if len(terms) > 1:
+            model.AddAtMostOne(terms)
 
     # -----------------------------
     # Restricciones específicas
     # -----------------------------
 
-    # max_consecutive por (group,subject)
+    # max_consecutive por (group,subject): a lo sumo m ocupados en cada ventana de m+1 periodos
+    ppd = cal.periods_per_day
     for k, req in c.req_by_key.items():
         m = req.max_consecutive
-        if m is None or m < 1:
+        if m is None or m < 1 or m >= ppd:
             continue
 
         for d in cal.days:
-            silist = sorted(slots_by_day.get(d, []), key=lambda si: c.slots[si].period)
-            if not silist:
-                continue
+            # occ de k ese día por periodo (posición p-1); None si no puede haber clase
+            day_occ: List[Optional[cp_model.IntVar]] = []
+            for p in range(1, ppd + 1):
+                si = slot_by_day_period.get((d, p))
+                day_occ.append(occ.get((k, si)) if si is not None else None)
 
-            for start_p in range(1, cal.periods_per_day - m + 1):
-                window = [si for si in silist if start_p <= c.slots[si].period <= start_p + m]
-                if window:
-                    model.Add(sum(occ[(k, si)] for si in window) <= m)
+            for start in range(ppd - m):
+                window = [v for v in day_occ[start:start + m + 1] if v is not None]
+                if len(window) > m:
+                    model.Add(sum(window) <= m)
 
     # Subject.max_per_day (hard)
     subj_by_id = problem.index_subjects()
@@ -325,20 +289,20 @@ def solve(problem: TimetableProblem) -> TimetableSolution:
         if maxpd is None:
             continue
         for d in cal.days:
-            silist = slots_by_day.get(d, [])
-            if silist:
-                model.Add(sum(occ[(k, si)] for si in silist) <= maxpd)
+            terms = [occ[(k, si)] for si in slots_by_day.get(d, []) if (k, si) in occ]
+            if len(terms) > maxpd:
+                model.Add(sum(terms) <= maxpd)
 
     # forbidden_periods soft si config says not hard
-    forbidden_soft_terms: List[cp_model.IntVar] = []
+    forbidden_soft_terms: List[cp_model.LinearExprT] = []
     if not problem.config.forbidden_periods_hard:
         for k, req in c.req_by_key.items():
             if not req.forbidden_periods:
                 continue
-            forb = set(req.forbidden_periods)
+            forb = req.forbidden_mask
             for si, slot in enumerate(c.slots):
-                if slot.period in forb:
-                    forbidden_soft_terms.append(occ[(k, si)])
+                if (forb >> slot.period) & 1:
+                    forbidden_soft_terms.append(occ.get((k, si), 0))
 
     # -----------------------------
     # Objetivo (soft constraints)
@@ -346,43 +310,47 @@ def solve(problem: TimetableProblem) -> TimetableSolution:
     objective_terms: List[cp_model.LinearExpr] = []
 
     # 1) gaps profesores
-    gap_vars: List[cp_model.IntVar] = []
+    gap_vars: List[cp_model.LinearExprT] = []
     for tid in teachers.keys():
+        t_busy = busy[tid]
         for d in cal.days:
-            silist = sorted(slots_by_day.get(d, []), key=lambda si: c.slots[si].period)
             for p in range(2, cal.periods_per_day):
-                si_prev = next((si for si in silist if c.slots[si].period == p - 1), None)
-                si_cur = next((si for si in silist if c.slots[si].period == p), None)
-                si_next = next((si for si in silist if c.slots[si].period == p + 1), None)
+                si_prev = slot_by_day_period.get((d, p - 1))
+                si_cur = slot_by_day_period.get((d, p))
+                si_next = slot_by_day_period.get((d, p + 1))
                 if si_prev is None or si_cur is None or si_next is None:
                     continue
+                # sin clase posible antes o después no puede haber hueco
+                b_prev, b_cur, b_next = t_busy[si_prev], t_busy[si_cur], t_busy[si_next]
+                if b_prev is None or b_next is None:
+                    gap_vars.append(0)
+                    continue
                 gvar = model.NewBoolVar(f"gap[{tid},{d},{p}]")
-                model.Add(gvar >= busy[(tid, si_prev)] + busy[(tid, si_next)] - busy[(tid, si_cur)] - 1)
+                model.Add(gvar >= b_prev + b_next - (b_cur if b_cur is not None else 0) - 1)
                 gap_vars.append(gvar)
     if gap_vars and weights.teacher_gaps:
         objective_terms.append(weights.teacher_gaps * sum(gap_vars))
 
     # 2) última hora profe
-    late_vars: List[cp_model.IntVar] = []
+    late_vars: List[cp_model.LinearExprT] = []
     for tid in teachers.keys():
         for d in cal.days:
-            si_last = next(
-                (si for si in slots_by_day.get(d, []) if c.slots[si].period == cal.periods_per_day),
-                None
-            )
+            si_last = slot_by_day_period.get((d, cal.periods_per_day))
             if si_last is not None:
-                late_vars.append(busy[(tid, si_last)])
+                b_last = busy[tid][si_last]
+                late_vars.append(b_last if b_last is not None else 0)
     if late_vars and weights.teacher_late:
         objective_terms.append(weights.teacher_late * sum(late_vars))
 
     # 3) repetir misma asignatura el mismo día (excess)
-    excess_vars: List[cp_model.IntVar] = []
+    excess_vars: List[cp_model.LinearExprT] = []
     for k in keys:
         for d in cal.days:
-            silist = slots_by_day.get(d, [])
-            if not silist:
+            terms = [occ[(k, si)] for si in slots_by_day.get(d, []) if (k, si) in occ]
+            if len(terms) < 2:
+                excess_vars.append(0)  # con menos de 2 clases posibles no hay exceso
                 continue
-            cnt = sum(occ[(k, si)] for si in silist)
+            cnt = sum(terms)
             ex = model.NewIntVar(0, cal.periods_per_day, f"excess[{k[0]},{k[1]},{d}]")
             model.Add(ex >= cnt - 1)
             excess_vars.append(ex)
@@ -390,14 +358,14 @@ def solve(problem: TimetableProblem) -> TimetableSolution:
         objective_terms.append(weights.subject_same_day_excess * sum(excess_vars))
 
     # 4) preferred_periods penalty
-    pref_terms: List[cp_model.IntVar] = []
+    pref_terms: List[cp_model.LinearExprT] = []
     for k, req in c.req_by_key.items():
         if not req.preferred_periods:
             continue
-        pref = set(req.preferred_periods)
+        pref = req.preferred_mask
         for si, slot in enumerate(c.slots):
-            if slot.period not in pref:
-                pref_terms.append(occ[(k, si)])
+            if not (pref >> slot.period) & 1:
+                pref_terms.append(occ.get((k, si), 0))
     if pref_terms and weights.preferred_period_penalty:
         objective_terms.append(weights.preferred_period_penalty * sum(pref_terms))
 
@@ -416,6 +384,25 @@ def solve(problem: TimetableProblem) -> TimetableSolution:
         solver.parameters.max_time_in_seconds = float(problem.config.max_seconds)
     if problem.config.random_seed is not None:
         solver.parameters.random_seed = int(problem.config.random_seed)
+    solver.parameters.num_workers = _num_workers(problem.config.num_workers)
+    if problem.config.linearization_level is not None:
+        solver.parameters.linearization_level = int(problem.config.linearization_level)
+    if problem.config.fast_mode:
+        solver.parameters.use_lns_only = True
+    if logger.isEnabledFor(logging.DEBUG):
+        # Log de búsqueda de CP-SAT redirigido al logging de la app (APP_DEBUG=true)
+        solver.parameters.log_search_progress = True
+        solver.parameters.log_to_stdout = False
+        solver.log_callback = logger.debug
+        logger.debug(
+            "CP-SAT params: workers=%d linearization_level=%d use_lns_only=%s",
+            solver.parameters.num_workers,
+            solver.parameters.linearization_level,
+            solver.parameters.use_lns_only,
+        )
+
+    if hint is not None:
+        _add_solution_hint(model, c, hint, x=x, y=y, a=a)
 
     status = solver.Solve(model)
 
@@ -425,20 +412,24 @@ def solve(problem: TimetableProblem) -> TimetableSolution:
     # -----------------------------
     # Construir solución
     # -----------------------------
+    # Valores de todas las variables leídos una vez (índice de variable -> valor);
+    # evita una llamada a solver.Value() por candidato.
+    values = list(solver.response_proto.solution)
+
     teacher_assignment: Dict[TeacherKey, str] = {}
     for k in keys:
         pool = c.key_pools[k]
-        chosen = next((tid for tid in pool if solver.Value(a[(k, tid)]) == 1), None)
+        chosen = next((tid for tid in pool if values[a[(k, tid)].index]), None)
         teacher_assignment[k] = chosen if chosen is not None else pool[0]
 
     event_room: Dict[str, str] = {}
     for e in c.events:
-        chosen = next((rid for rid in c.allowed_rooms[e.id] if solver.Value(y[(e.id, rid)]) == 1), None)
+        chosen = next((rid for rid in c.allowed_rooms[e.id] if values[y[(e.id, rid)].index]), None)
         event_room[e.id] = chosen if chosen is not None else c.allowed_rooms[e.id][0]
 
     scheduled: List[ScheduledEvent] = []
     for e in c.events:
-        chosen_si = next((si for si in c.allowed_slots[e.id] if solver.Value(x[(e.id, si)]) == 1), None)
+        chosen_si = next((si for si in c.allowed_slots[e.id] if values[x[(e.id, si)].index]), None)
         if chosen_si is None:
             chosen_si = c.allowed_slots[e.id][0]
         scheduled.append(ScheduledEvent(event_id=e.id, slot=c.slots[chosen_si], room_id=event_room[e.id]))
@@ -458,6 +449,7 @@ def solve(problem: TimetableProblem) -> TimetableSolution:
     return TimetableSolution(
         scheduled=tuple(scheduled),
         teacher_assignment=teacher_assignment,
-        objective_value=int(solver.ObjectiveValue()) if objective_terms else None,
+        objective_value=round(solver.ObjectiveValue()) if objective_terms else None,
         objective_breakdown=breakdown,
+        optimal=status == cp_model.OPTIMAL,
     )
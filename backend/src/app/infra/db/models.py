@@ -3,9 +3,14 @@ from __future__ import annotations
 from datetime import datetime
 
 from sqlalchemy import JSON, DateTime, String, func
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
 
 
+# Binary JSON on Postgres (no reparse on read); plain JSON elsewhere.
+_JsonType = JSON().with_variant(JSONB(), "postgresql")
+
+
 class Base(DeclarativeBase):
     pass
 
@@ -15,9 +20,14 @@ class ProjectModel(Base):
 
     id: Mapped[str] = mapped_column(String(64), primary_key=True)
     name: Mapped[str] = mapped_column(String(120), nullable=False)
-    problem: Mapped[dict] = mapped_column(JSON, nullable=False)
-    last_solution: Mapped[dict | None] = mapped_column(JSON, nullable=True)
-    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    problem: Mapped[dict] = mapped_column(_JsonType, nullable=False)
+    last_solution: Mapped[dict | None] = mapped_column(_JsonType, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        nullable=False,
+        index=True,
+    )
     updated_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True),
         server_default=func.now(),
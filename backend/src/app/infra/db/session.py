@@ -4,6 +4,7 @@ from collections.abc import Generator
 
 from sqlalchemy import create_engine
 from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import NullPool
 
 from app.settings import load_settings
 
@@ -12,13 +13,31 @@ settings = load_settings()
 if not settings.database_url:
     raise RuntimeError("DATABASE_URL is required when DB_BACKEND=postgres")
 
-engine = create_engine(settings.database_url, pool_pre_ping=True)
-SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, class_=Session)
-
-
+if settings.db_use_nullpool:
+    # Behind an external pooler (pgbouncer) keep no connections of our own.
+    engine = create_engine(settings.database_url, poolclass=NullPool, pool_pre_ping=settings.db_pre_ping)
+else:
+    engine = create_engine(
+        settings.database_url,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_recycle=settings.db_pool_recycle,
+        pool_pre_ping=settings.db_pre_ping,
+    )
+
+# Records are built from the rows right after commit; keep them loaded instead of
+# re-selecting expired attributes.
+SessionLocal = sessionmaker(
+    bind=engine,
+    autoflush=False,
+    autocommit=False,
+    expire_on_commit=False,
+    class_=Session,
+)
+
+
+# Sessions are synchronous: routes that use them are plain `def` (FastAPI's threadpool)
+# or hand each repository call to a worker thread, so a round trip never blocks the loop.
 def get_db() -> Generator[Session, None, None]:
-    db = SessionLocal()
-    try:
+    with SessionLocal() as db:
         yield db
-    finally:
-        db.close()
@@ -2,6 +2,7 @@ from __future__ import annotations
 
 from dataclasses import dataclass, field
 from datetime import datetime, timezone
+from itertools import islice
 from threading import Lock
 from typing import Any, Protocol
 from uuid import uuid4
@@ -9,7 +10,7 @@ from uuid import uuid4
 from app.services.errors import NotFoundError
 
 
-@dataclass
+@dataclass(slots=True)
 class ProjectRecord:
     id: str
     name: str
@@ -20,7 +21,13 @@ class ProjectRecord:
 
 
 class ProjectRepository(Protocol):
-    def list(self) -> list[ProjectRecord]: ...
+    def list(
+        self,
+        *,
+        limit: int | None = None,
+        offset: int = 0,
+        with_problem: bool = True,
+    ) -> list[ProjectRecord]: ...
 
     def get(self, project_id: str) -> ProjectRecord: ...
 
@@ -44,8 +51,18 @@ class InMemoryProjectRepository:
         self._lock = Lock()
         self._projects: dict[str, ProjectRecord] = {}
 
-    def list(self) -> list[ProjectRecord]:
-        return sorted(self._projects.values(), key=lambda project: project.created_at)
+    def list(
+        self,
+        *,
+        limit: int | None = None,
+        offset: int = 0,
+        with_problem: bool = True,
+    ) -> list[ProjectRecord]:
+        # Projects are only ever inserted by create() (update mutates in place), so dict
+        # insertion order is already created_at order. Records are already in memory, so
+        # with_problem makes no difference here.
+        stop = None if limit is None else offset + limit
+        return list(islice(self._projects.values(), offset, stop))
 
     def get(self, project_id: str) -> ProjectRecord:
         project = self._projects.get(project_id)
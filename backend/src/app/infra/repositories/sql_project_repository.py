@@ -4,12 +4,15 @@ from datetime import timezone
 from typing import Any
 from uuid import uuid4
 
+from sqlalchemy import select, update
 from sqlalchemy.orm import Session
 
 from app.infra.db.models import ProjectModel
 from app.infra.repositories.project_repository import ProjectRecord, ProjectRepository
 from app.services.errors import NotFoundError
 
+_LIST_BATCH_SIZE = 200
+
 
 class SqlProjectRepository(ProjectRepository):
     def __init__(self, db: Session) -> None:
@@ -25,9 +28,45 @@ class SqlProjectRepository(ProjectRepository):
             updated_at=model.updated_at.astimezone(timezone.utc),
         )
 
-    def list(self) -> list[ProjectRecord]:
-        rows = self._db.query(ProjectModel).order_by(ProjectModel.created_at.asc()).all()
-        return [self._to_record(row) for row in rows]
+    def list(
+        self,
+        *,
+        limit: int | None = None,
+        offset: int = 0,
+        with_problem: bool = True,
+    ) -> list[ProjectRecord]:
+        """List projects by creation time.
+
+        With ``with_problem=False`` only the summary columns are selected and the returned
+        records carry an empty ``problem`` and no ``last_solution``.
+        """
+        if with_problem:
+            stmt = select(ProjectModel)
+        else:
+            stmt = select(
+                ProjectModel.id,
+                ProjectModel.name,
+                ProjectModel.created_at,
+                ProjectModel.updated_at,
+            )
+        stmt = stmt.order_by(ProjectModel.created_at.asc()).offset(offset)
+        if limit is not None:
+            stmt = stmt.limit(limit)
+        # Stream rows in batches instead of buffering the whole result before converting.
+        stmt = stmt.execution_options(yield_per=_LIST_BATCH_SIZE)
+
+        if with_problem:
+            return [self._to_record(row) for row in self._db.scalars(stmt)]
+        return [
+            ProjectRecord(
+                id=row.id,
+                name=row.name,
+                problem={},
+                created_at=row.created_at.astimezone(timezone.utc),
+                updated_at=row.updated_at.astimezone(timezone.utc),
+            )
+            for row in self._db.execute(stmt)
+        ]
 
     def get(self, project_id: str) -> ProjectRecord:
         row = self._db.get(ProjectModel, project_id)
@@ -49,19 +88,14 @@ class SqlProjectRepository(ProjectRepository):
         name: str | None = None,
         problem: dict[str, Any] | None = None,
     ) -> ProjectRecord:
-        model = self._db.get(ProjectModel, project_id)
-        if model is None:
-            raise NotFoundError("Project", project_id)
-
+        values: dict[str, Any] = {}
         if name is not None:
-            model.name = name.strip()
+            values["name"] = name.strip()
         if problem is not None:
-            model.problem = problem
-
-        self._db.add(model)
-        self._db.commit()
-        self._db.refresh(model)
-        return self._to_record(model)
+            values["problem"] = problem
+        if not values:
+            return self.get(project_id)
+        return self._update_returning(project_id, values)
 
     def delete(self, project_id: str) -> None:
         model = self._db.get(ProjectModel, project_id)
@@ -71,11 +105,21 @@ class SqlProjectRepository(ProjectRepository):
         self._db.commit()
 
     def set_solution(self, project_id: str, solution: dict[str, Any]) -> ProjectRecord:
-        model = self._db.get(ProjectModel, project_id)
+        return self._update_returning(project_id, {"last_solution": solution})
+
+    def _update_returning(self, project_id: str, values: dict[str, Any]) -> ProjectRecord:
+        # Single UPDATE ... RETURNING roundtrip instead of SELECT + UPDATE + refresh.
+        stmt = (
+            update(ProjectModel)
+            .where(ProjectModel.id == project_id)
+            .values(**values)
+            .returning(ProjectModel)
+            .execution_options(populate_existing=True)
+        )
+        model = self._db.scalars(stmt).one_or_none()
         if model is None:
+            self._db.rollback()
             raise NotFoundError("Project", project_id)
-        model.last_solution = solution
-        self._db.add(model)
+        record = self._to_record(model)
         self._db.commit()
-        self._db.refresh(model)
-        return self._to_record(model)
+        return record
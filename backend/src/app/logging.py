@@ -2,16 +2,36 @@ from __future__ import annotations
 
 import logging
 
+import orjson
 
-def configure_logging(debug: bool = False) -> None:
+_TEXT_FORMAT = "%(asctime)s | %(levelname)s | %(name)s | %(message)s"
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, for log collectors."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return orjson.dumps(entry).decode()
+
+
+def configure_logging(debug: bool = False, json_logs: bool = False) -> None:
     level = logging.DEBUG if debug else logging.INFO
     root = logging.getLogger()
 
+    # Handlers installed by someone else (uvicorn --log-config, pytest) are kept; only the
+    # level is applied to them.
     if not root.handlers:
-        logging.basicConfig(
-            level=level,
-            format="%(asctime)s | %(levelname)s | %(name)s | %(message)s",
-        )
+        handler = logging.StreamHandler()
+        handler.setFormatter(JsonFormatter() if json_logs else logging.Formatter(_TEXT_FORMAT))
+        logging.basicConfig(level=level, handlers=[handler])
         return
 
     root.setLevel(level)
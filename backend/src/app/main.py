@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 from fastapi import FastAPI, HTTPException, Request
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.responses import JSONResponse
 
 from app.api.routers.health import router as health_router
@@ -14,9 +15,11 @@ from app.domain.core.validate import ValidationError
 
 def create_app(settings: Settings | None = None) -> FastAPI:
     active_settings = settings or load_settings()
-    configure_logging(debug=active_settings.debug)
+    configure_logging(debug=active_settings.debug, json_logs=active_settings.log_json)
 
     app = FastAPI(title=active_settings.app_name, version=active_settings.app_version)
+    # Problems and solutions are large, repetitive JSON documents.
+    app.add_middleware(GZipMiddleware, minimum_size=1024)
 
     @app.exception_handler(NotFoundError)
     async def handle_not_found(_: Request, exc: NotFoundError) -> JSONResponse:
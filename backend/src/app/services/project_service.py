@@ -7,8 +7,14 @@ class ProjectService:
     def __init__(self, repository: ProjectRepository) -> None:
         self._repository = repository
 
-    def list_projects(self) -> list[ProjectRecord]:
-        return self._repository.list()
+    def list_projects(
+        self,
+        *,
+        limit: int | None = None,
+        offset: int = 0,
+        with_problem: bool = True,
+    ) -> list[ProjectRecord]:
+        return self._repository.list(limit=limit, offset=offset, with_problem=with_problem)
 
     def get_project(self, project_id: str) -> ProjectRecord:
         return self._repository.get(project_id)
@@ -1,26 +1,142 @@
 from __future__ import annotations
 
+from collections import OrderedDict
+from dataclasses import replace
+from hashlib import blake2b
+import os
+from threading import Lock
+import time
 from typing import Any
 
-from app.domain.core.io import problem_from_dict, solution_to_dict
+import orjson
+
+from app.domain.core.io import problem_from_dict, solution_from_dict, solution_to_dict
+from app.domain.core.schema import TimetableProblem, TimetableSolution
 from app.domain.core.validate import ValidationError, ValidationReport, validate_problem
+from app.settings import Settings, load_settings
+
+# Share of max_seconds spent on the local-search warm start (config.warmstart).
+_WARMSTART_FRACTION = 0.2
+# Budget base when the problem has no time limit.
+_WARMSTART_DEFAULT_SECONDS = 30
+# Portfolio search barely scales past this many workers.
+_MAX_DEFAULT_WORKERS = 16
+
+
+def _default_num_workers(settings: Settings) -> int:
+    """CP-SAT workers per solve when the payload leaves num_workers unset.
+
+    API solves run concurrently in worker threads, so the CPUs are split among the
+    expected concurrent solves instead of giving every solve all of them.
+    """
+    if settings.solver_workers:
+        return settings.solver_workers
+    cpus = os.cpu_count() or 8
+    return max(1, min(_MAX_DEFAULT_WORKERS, cpus // settings.solver_concurrency))
+
+
+def _payload_key(payload: dict[str, Any]) -> bytes:
+    """Canonical hash of a problem payload (key order does not matter).
+
+    List order is kept: event numbering, CHOOSE pool order and symmetry breaking
+    follow the order of the entities, so reordered payloads are different problems.
+    """
+    return blake2b(orjson.dumps(payload, option=orjson.OPT_SORT_KEYS), digest_size=16).digest()
 
 
 class SolverService:
-    def validate_problem(self, payload: dict[str, Any]) -> ValidationReport:
+    def __init__(self, cache_size: int = 128, default_workers: int | None = None) -> None:
+        # Applied to problems without config.num_workers; None leaves the solver's own default.
+        self._default_workers = default_workers
+        # Keyed by payload content, so editing a project simply yields a new key.
+        # Solutions are stored as orjson bytes: every hit decodes a fresh dict, so callers
+        # (and the project repositories) never share one mutable object.
+        self._cache_size = cache_size
+        self._solutions: OrderedDict[bytes, bytes] = OrderedDict()
+        # Parsed problem + validation report, shared by /validate and the solve that follows it.
+        self._parsed: OrderedDict[bytes, tuple[TimetableProblem, ValidationReport]] = OrderedDict()
+        self._lock = Lock()
+
+    def _remember(self, cache: OrderedDict[bytes, Any], key: bytes, value: Any) -> None:
+        if self._cache_size <= 0:
+            return
+        with self._lock:
+            cache[key] = value
+            cache.move_to_end(key)
+            while len(cache) > self._cache_size:
+                cache.popitem(last=False)
+
+    def _parse_and_validate(
+        self, payload: dict[str, Any], key: bytes
+    ) -> tuple[TimetableProblem, ValidationReport]:
+        with self._lock:
+            cached = self._parsed.get(key)
+            if cached is not None:
+                self._parsed.move_to_end(key)
+                return cached
+
         problem = problem_from_dict(payload)
-        return validate_problem(problem, raise_on_error=False)
+        report = validate_problem(problem, raise_on_error=False)
+        self._remember(self._parsed, key, (problem, report))
+        return problem, report
+
+    def _warmstart(self, problem: TimetableProblem) -> TimetableSolution | None:
+        """Tabu search over slots/teachers; its best assignment becomes the CP-SAT hint."""
+        from app.domain.solver.local_search import tabu_search
+
+        budget = _WARMSTART_FRACTION * (problem.config.max_seconds or _WARMSTART_DEFAULT_SECONDS)
+        return tabu_search(problem, budget, seed=problem.config.random_seed)
 
-    def solve_problem(self, payload: dict[str, Any]) -> dict[str, Any]:
+    def validate_problem(self, payload: dict[str, Any]) -> ValidationReport:
+        _, report = self._parse_and_validate(payload, _payload_key(payload))
+        return report
+
+    def solve_problem(
+        self,
+        payload: dict[str, Any],
+        previous_solution: dict[str, Any] | None = None,
+    ) -> dict[str, Any]:
+        """Solve ``payload``; ``previous_solution`` (e.g. a project's last one) warm-starts the search."""
         from app.domain.solver.solve import solve
 
-        problem = problem_from_dict(payload)
-        validate_problem(problem)
-        solution = solve(problem)
-        return solution_to_dict(solution)
+        key = _payload_key(payload)
+        # The key ignores previous_solution: a re-solve with a hint always reaches CP-SAT.
+        if not previous_solution:
+            with self._lock:
+                cached = self._solutions.get(key)
+                if cached is not None:
+                    self._solutions.move_to_end(key)
+            if cached is not None:
+                return orjson.loads(cached)
+
+        problem, report = self._parse_and_validate(payload, key)
+        if not report.ok:
+            raise ValidationError(report.errors)
+        if problem.config.num_workers is None and self._default_workers:
+            problem = replace(problem, config=replace(problem.config, num_workers=self._default_workers))
+        hint = None
+        if previous_solution:
+            try:
+                hint = solution_from_dict(previous_solution)
+            except (KeyError, TypeError, ValueError):
+                hint = None  # only a search hint: a stale/malformed one is just skipped
+        if hint is None and problem.config.warmstart:
+            started = time.monotonic()
+            hint = self._warmstart(problem)
+            if problem.config.max_seconds is not None:
+                # The warm start comes out of the same time budget.
+                remaining = max(1, problem.config.max_seconds - int(time.monotonic() - started))
+                problem = replace(problem, config=replace(problem.config, max_seconds=remaining))
+        result = solve(problem, hint=hint)
+        solution = solution_to_dict(result)
+        # A FEASIBLE result cut off by the time limit may improve on a re-solve: only
+        # proven optima are reused.
+        if result.optimal:
+            self._remember(self._solutions, key, orjson.dumps(solution))
+        return solution
 
 
-solver_service = SolverService()
+solver_service = SolverService(default_workers=_default_num_workers(load_settings()))
 
 
 __all__ = ["SolverService", "solver_service", "ValidationError", "ValidationReport"]
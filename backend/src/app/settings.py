@@ -1,8 +1,14 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
+from functools import lru_cache
 import os
 from pathlib import Path
+import re
+
+
+# Líneas KEY=VALUE que no son comentarios (# tras espacios opcionales).
+_ENV_LINE = re.compile(r"^(?![ \t]*#)[ \t]*([^=\n]+?)=(.*)$", re.MULTILINE)
 
 
 def _load_local_env_file() -> None:
@@ -11,33 +17,60 @@ def _load_local_env_file() -> None:
     if not env_path.exists():
         return
 
-    for raw_line in env_path.read_text(encoding='utf-8').splitlines():
-        line = raw_line.strip()
-        if not line or line.startswith('#') or '=' not in line:
-            continue
-        key, value = line.split('=', 1)
-        key = key.strip()
-        value = value.strip().strip('"').strip("'")
-        os.environ.setdefault(key, value)
+    # Una sola pasada del regex sobre el fichero completo; el valor se recorta de espacios y comillas.
+    for match in _ENV_LINE.finditer(env_path.read_text(encoding='utf-8')):
+        key = match.group(1).strip()
+        if key:
+            os.environ.setdefault(key, match.group(2).strip().strip('"').strip("'"))
 
 
 _load_local_env_file()
 
 
-@dataclass(frozen=True)
+_TRUTHY = frozenset({"1", "true", "yes"})
+
+
+def _env_flag(name: str, default: str) -> bool:
+    return os.getenv(name, default).lower() in _TRUTHY
+
+
+@dataclass(frozen=True, slots=True)
 class Settings:
     app_name: str
     app_version: str
     debug: bool
     db_backend: str
     database_url: str | None
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_recycle: int = -1
+    db_pre_ping: bool = True
+    db_use_nullpool: bool = False
+    log_json: bool = False
+    # CP-SAT: hilos por resolución si el problema no fija num_workers (None = CPUs / solver_concurrency)
+    solver_workers: int | None = None
+    # resoluciones simultáneas esperadas; se reparten las CPUs entre ellas
+    solver_concurrency: int = 4
 
 
+@lru_cache(maxsize=1)
 def load_settings() -> Settings:
+    """Settings del entorno, leídas una sola vez por proceso.
+
+    Si se cambian variables de entorno (p.ej. en tests), llamar a load_settings.cache_clear().
+    """
     return Settings(
         app_name=os.getenv("APP_NAME", "app-horarios"),
         app_version=os.getenv("APP_VERSION", "0.1.0"),
-        debug=os.getenv("APP_DEBUG", "false").lower() in {"1", "true", "yes"},
+        debug=_env_flag("APP_DEBUG", "false"),
         db_backend=os.getenv("DB_BACKEND", "memory"),
         database_url=os.getenv("DATABASE_URL"),
+        db_pool_size=int(os.getenv("DB_POOL_SIZE", "5")),
+        db_max_overflow=int(os.getenv("DB_MAX_OVERFLOW", "10")),
+        db_pool_recycle=int(os.getenv("DB_POOL_RECYCLE", "-1")),
+        db_pre_ping=_env_flag("DB_PRE_PING", "true"),
+        db_use_nullpool=_env_flag("DB_USE_NULLPOOL", "false"),
+        log_json=_env_flag("APP_LOG_JSON", "false"),
+        solver_workers=int(os.environ["SOLVER_WORKERS"]) if os.getenv("SOLVER_WORKERS") else None,
+        solver_concurrency=max(1, int(os.getenv("SOLVER_CONCURRENCY", "4"))),
     )
@@ -0,0 +1,65 @@
+# _print_util.py
+# Utilidades compartidas por big_example.py y biggest_example.py.
+from __future__ import annotations
+
+import sys
+from collections import defaultdict
+from typing import Dict, Tuple
+
+from app.domain.core.schema import Slot, TimetableProblem
+
+
+# Slots internados: cada (día, periodo) se instancia una sola vez por proceso.
+_SLOTS: Dict[Tuple[str, int], Slot] = {}
+
+
+def mk_slot(day: str, period: int) -> Slot:
+    s = _SLOTS.get((day, period))
+    if s is None:
+        s = _SLOTS[(day, period)] = Slot(day, period)
+    return s
+
+
+def parse_event_id(eid: str) -> tuple[str, str]:
+    # "GROUP-SUBJECT-XX"  (ojo: group/subject no deben contener '-')
+    g, _, rest = eid.partition("-")
+    return g, rest.partition("-")[0]
+
+
+def print_group_timetables(
+    problem: TimetableProblem,
+    sol,
+    *,
+    limit_groups: int | None = None,
+    cell_width: int = 10,
+    free_label: str = "(LIB)",
+    title: str = "HORARIOS POR GRUPO",
+    rule_width: int = 120,
+) -> None:
+    blocked_cell = "[BLOQ]".ljust(cell_width)
+    free_cell = free_label.ljust(cell_width)
+    cell_format = f"%-{cell_width}.{cell_width}s"  # rellena y recorta a ancho fijo (= ljust + slice)
+
+    by_group: Dict[str, Dict[Slot, str]] = defaultdict(dict)
+    for se in sol.scheduled:
+        g, sub = parse_event_id(se.event_id)
+        by_group[g][se.slot] = cell_format % f"{sub}@{se.room_id}"
+
+    days = problem.calendar.days
+    ppd = problem.calendar.periods_per_day
+    blocked = problem.calendar.blocked_slots
+    # Slots de cada día, resueltos una vez para todos los grupos.
+    week = [(d, [mk_slot(d, p) for p in range(1, ppd + 1)]) for d in days]
+
+    groups = problem.groups if limit_groups is None else problem.groups[:limit_groups]
+
+    lines = ["", "=" * rule_width, title, "=" * rule_width]
+    for g in groups:
+        lines.append("")
+        lines.append(f"--- {g.id} (size={g.size}) ---")
+        cells = by_group[g.id]
+        for d, day_slots in week:
+            row = [blocked_cell if s in blocked else cells.get(s, free_cell) for s in day_slots]
+            lines.append(f"{d}: " + " | ".join(row))
+    # Una sola escritura en vez de un print por fila.
+    sys.stdout.write("\n".join(lines) + "\n")
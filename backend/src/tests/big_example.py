@@ -1,19 +1,23 @@
 # run_instituto_grande.py
 from __future__ import annotations
 
+import sys
 from collections import defaultdict
 from dataclasses import replace
+from operator import itemgetter
 from typing import Dict, List, Tuple
 
-from solver.schema import (
+from app.domain.core.schema import (
     Calendar, Slot,
     Group, Subject, Teacher, Room,
     RoomType, TeacherPolicy,
     CourseRequirement, SolveConfig, ObjectiveWeights,
     TimetableProblem,
 )
-from solver.validate import validate_problem
-from solver.solve import solve
+from app.domain.core.validate import validate_problem
+from app.domain.solver.solve import solve
+
+from _print_util import mk_slot, print_group_timetables as _print_group_timetables
 
 
 # -----------------------------
@@ -23,68 +27,30 @@ from solver.solve import solve
 DAYS = ("mon", "tue", "wed", "thu", "fri")
 
 def slots_for_day(day: str, periods_per_day: int) -> List[Slot]:
-    return [Slot(day, p) for p in range(1, periods_per_day + 1)]
+    return [mk_slot(day, p) for p in range(1, periods_per_day + 1)]
 
 def mk_unavail(pattern: List[Tuple[str, int]]) -> frozenset[Slot]:
-    return frozenset(Slot(d, p) for d, p in pattern)
+    return frozenset(mk_slot(d, p) for d, p in pattern)
 
-def parse_event_id(eid: str) -> tuple[str, str]:
-    # "GROUP-SUBJECT-XX"  (ojo: group/subject no deben contener '-')
-    parts = eid.split("-")
-    return parts[0], parts[1]
 
 def print_group_timetables(problem: TimetableProblem, sol, *, limit_groups: int | None = None) -> None:
-    ev_by_id = {se.event_id: se for se in sol.scheduled}
-
-    by_group: Dict[str, Dict[Slot, Tuple[str, str]]] = defaultdict(dict)
-    for eid, se in ev_by_id.items():
-        g, sub = parse_event_id(eid)
-        by_group[g][se.slot] = (sub, se.room_id)
-
-    days = problem.calendar.days
-    ppd = problem.calendar.periods_per_day
-    blocked = problem.calendar.blocked_slots
-
-    groups = list(problem.groups)
-    if limit_groups is not None:
-        groups = groups[:limit_groups]
-
-    print("\n" + "=" * 120)
-    print("HORARIOS POR GRUPO")
-    print("=" * 120)
-
-    for g in groups:
-        print(f"\n--- {g.id} (size={g.size}) ---")
-        for d in days:
-            row = []
-            for p in range(1, ppd + 1):
-                s = Slot(d, p)
-                if s in blocked:
-                    row.append("[BLOQ]".ljust(10))
-                else:
-                    item = by_group[g.id].get(s)
-                    if not item:
-                        row.append("(LIB)".ljust(10))
-                    else:
-                        sub, rid = item
-                        row.append(f"{sub}@{rid}".ljust(10)[:10])
-            print(f"{d}: " + " | ".join(row))
+    _print_group_timetables(problem, sol, limit_groups=limit_groups, cell_width=10, rule_width=120)
 
 def print_teacher_summary(problem: TimetableProblem, sol) -> None:
     # Resumen: profesor asignado a cada (group, subject)
-    print("\n" + "=" * 120)
-    print("ASIGNACIÓN DE PROFESORES (group,subject) -> teacher")
-    print("=" * 120)
-    items = sorted(sol.teacher_assignment.items(), key=lambda kv: (kv[0][0], kv[0][1]))
+    lines = ["", "=" * 120, "ASIGNACIÓN DE PROFESORES (group,subject) -> teacher", "=" * 120]
+    items = sorted(sol.teacher_assignment.items(), key=itemgetter(0))  # (group, subject)
     for (g, sub), tid in items:
-        print(f"{g:8s} {sub:6s} -> {tid}")
+        lines.append(f"{g:8s} {sub:6s} -> {tid}")
+    sys.stdout.write("\n".join(lines) + "\n")
 
 def print_objective(sol) -> None:
-    print("\n" + "=" * 120)
-    print("OBJETIVO")
-    print("=" * 120)
-    print("objective_value:", sol.objective_value)
-    print("objective_breakdown:", sol.objective_breakdown)
+    lines = [
+        "", "=" * 120, "OBJETIVO", "=" * 120,
+        f"objective_value: {sol.objective_value}",
+        f"objective_breakdown: {sol.objective_breakdown}",
+    ]
+    sys.stdout.write("\n".join(lines) + "\n")
 
 
 # -----------------------------
@@ -99,8 +65,8 @@ def build_institute_problem() -> TimetableProblem:
         days=DAYS,
         periods_per_day=periods_per_day,
         blocked_slots=frozenset({
-            Slot("wed", 4),  # recreo/descanso
-            Slot("fri", 7),  # reunión/claustro
+            mk_slot("wed", 4),  # recreo/descanso
+            mk_slot("fri", 7),  # reunión/claustro
         }),
     )
 
@@ -180,16 +146,18 @@ def build_institute_problem() -> TimetableProblem:
     teachers = []
 
     def add_teachers(prefix: str, n: int, can_teach: set[str], unavail_patterns: List[List[Tuple[str,int]]], max_week: int):
-        for i in range(1, n + 1):
-            pat = unavail_patterns[(i - 1) % len(unavail_patterns)]
-            teachers.append(
-                Teacher(
-                    id=f"{prefix}{i}",
-                    can_teach=frozenset(can_teach),
-                    unavailable=mk_unavail(pat),
-                    max_periods_per_week=max_week,
-                )
+        # can_teach y cada patrón de indisponibilidad se construyen una vez por llamada
+        teach = frozenset(can_teach)
+        unavail = [mk_unavail(pat) for pat in unavail_patterns]
+        teachers.extend(
+            Teacher(
+                id=f"{prefix}{i}",
+                can_teach=teach,
+                unavailable=unavail[(i - 1) % len(unavail)],
+                max_periods_per_week=max_week,
             )
+            for i in range(1, n + 1)
+        )
 
     # Patrones repetibles
     P = [
@@ -225,10 +193,13 @@ def build_institute_problem() -> TimetableProblem:
     teachers = tuple(teachers)
 
     # Helper: pool por asignatura (todos los que la pueden enseñar)
-    teachers_by_subject: Dict[str, Tuple[str, ...]] = defaultdict(tuple)
+    pools: Dict[str, List[str]] = defaultdict(list)
     for t in teachers:
         for s in t.can_teach:
-            teachers_by_subject[s] = tuple(list(teachers_by_subject[s]) + [t.id])
+            pools[s].append(t.id)
+    teachers_by_subject: Dict[str, Tuple[str, ...]] = defaultdict(
+        tuple, {s: tuple(ids) for s, ids in pools.items()}
+    )
 
     # Requirements
     # Slots lectivos por semana = 35 - 2 bloqueados = 33
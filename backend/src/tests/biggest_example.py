@@ -1,73 +1,46 @@
 # run_instituto_full_occupancy.py
 from __future__ import annotations
 
+import sys
 from collections import defaultdict
 from typing import Dict, List, Tuple
 
-from solver.schema import (
+from app.domain.core.schema import (
     Calendar, Slot,
     Group, Subject, Teacher, Room,
     RoomType, TeacherPolicy,
     CourseRequirement, SolveConfig, ObjectiveWeights,
     TimetableProblem,
 )
-from solver.validate import validate_problem
-from solver.solve import solve
+from app.domain.core.validate import validate_problem
+from app.domain.solver.solve import solve
 
-
-DAYS = ("mon", "tue", "wed", "thu", "fri")
+from _print_util import print_group_timetables as _print_group_timetables
 
 
-def parse_event_id(eid: str) -> tuple[str, str]:
-    # "GROUP-SUBJECT-XX"
-    parts = eid.split("-")
-    return parts[0], parts[1]
+DAYS = ("mon", "tue", "wed", "thu", "fri")
+_NO_UNAVAILABLE: frozenset[Slot] = frozenset()
 
 
 def print_group_timetables(problem: TimetableProblem, sol, *, limit_groups: int | None = None) -> None:
-    ev_by_id = {se.event_id: se for se in sol.scheduled}
-
-    by_group: Dict[str, Dict[Slot, Tuple[str, str]]] = defaultdict(dict)
-    for eid, se in ev_by_id.items():
-        g, sub = parse_event_id(eid)
-        by_group[g][se.slot] = (sub, se.room_id)
-
-    days = problem.calendar.days
-    ppd = problem.calendar.periods_per_day
-    blocked = problem.calendar.blocked_slots
-
-    groups = list(problem.groups)
-    if limit_groups is not None:
-        groups = groups[:limit_groups]
-
-    print("\n" + "=" * 140)
-    print("HORARIOS POR GRUPO (FULL OCCUPANCY)")
-    print("=" * 140)
-
-    for g in groups:
-        print(f"\n--- {g.id} (size={g.size}) ---")
-        for d in days:
-            row = []
-            for p in range(1, ppd + 1):
-                s = Slot(d, p)
-                if s in blocked:
-                    row.append("[BLOQ]".ljust(12))
-                else:
-                    item = by_group[g.id].get(s)
-                    if not item:
-                        row.append("(VACIO?)".ljust(12))
-                    else:
-                        sub, rid = item
-                        row.append(f"{sub}@{rid}".ljust(12)[:12])
-            print(f"{d}: " + " | ".join(row))
+    _print_group_timetables(
+        problem,
+        sol,
+        limit_groups=limit_groups,
+        cell_width=12,
+        free_label="(VACIO?)",
+        title="HORARIOS POR GRUPO (FULL OCCUPANCY)",
+        rule_width=140,
+    )
 
 
 def print_objective(sol) -> None:
-    print("\n" + "=" * 140)
-    print("OBJETIVO")
-    print("=" * 140)
-    print("objective_value:", sol.objective_value)
-    print("objective_breakdown:", sol.objective_breakdown)
+    lines = [
+        "", "=" * 140, "OBJETIVO", "=" * 140,
+        f"objective_value: {sol.objective_value}",
+        f"objective_breakdown: {sol.objective_breakdown}",
+    ]
+    sys.stdout.write("\n".join(lines) + "\n")
 
 
 def build_full_occupancy_institute() -> TimetableProblem:
@@ -158,15 +131,16 @@ def build_full_occupancy_institute() -> TimetableProblem:
     teachers: List[Teacher] = []
 
     def add_teachers(prefix: str, n: int, subject_id: str, max_week: int = 28):
-        for i in range(1, n + 1):
-            teachers.append(
-                Teacher(
-                    id=f"{prefix}{i}",
-                    can_teach=frozenset({subject_id}),
-                    unavailable=frozenset(),      # simplifica (rápido y feasible)
-                    max_periods_per_week=max_week
-                )
+        can_teach = frozenset({subject_id})  # compartido por los n profesores
+        teachers.extend(
+            Teacher(
+                id=f"{prefix}{i}",
+                can_teach=can_teach,
+                unavailable=_NO_UNAVAILABLE,      # simplifica (rápido y feasible)
+                max_periods_per_week=max_week,
             )
+            for i in range(1, n + 1)
+        )
 
     add_teachers("T_MATH_", 10, "MATH", max_week=28)
     add_teachers("T_LANG_", 8,  "LANG", max_week=28)
@@ -192,10 +166,13 @@ def build_full_occupancy_institute() -> TimetableProblem:
     teachers = tuple(teachers)
 
     # Pools por asignatura
-    teachers_by_subject: Dict[str, Tuple[str, ...]] = defaultdict(tuple)
+    pools: Dict[str, List[str]] = defaultdict(list)
     for t in teachers:
         for s in t.can_teach:
-            teachers_by_subject[s] = tuple(list(teachers_by_subject[s]) + [t.id])
+            pools[s].append(t.id)
+    teachers_by_subject: Dict[str, Tuple[str, ...]] = defaultdict(
+        tuple, {s: tuple(ids) for s, ids in pools.items()}
+    )
 
     # ------------------------------------------------------------------
     # REQUIREMENTS: FULL OCCUPANCY
@@ -2,16 +2,85 @@
 from __future__ import annotations
 
 from collections import defaultdict
+from dataclasses import replace
+import sys
 
-from solver.schema import (
+from app.domain.core.schema import (
     Calendar, Slot,
     Group, Subject, Teacher, Room,
     RoomType, TeacherPolicy,
     CourseRequirement, SolveConfig, ObjectiveWeights,
     TimetableProblem,
 )
-from solver.validate import validate_problem
-from solver.solve import solve
+from app.domain.core.validate import validate_problem
+from app.domain.solver.solve import solve
+
+
+# Requisitos comunes a todos los grupos (group_id se rellena con replace): los sets de
+# periodos y pools se construyen una vez y los comparten todos los grupos.
+_REQ_TEMPLATES: tuple[CourseRequirement, ...] = (
+    CourseRequirement(
+        group_id="", subject_id="MATH", periods_per_week=5, max_consecutive=2,
+        teacher_policy=TeacherPolicy.CHOOSE,
+        teacher_pool=("T_MATH1", "T_MATH2"),
+        preferred_periods=frozenset({2, 3, 4, 5}),
+        forbidden_periods=frozenset({6}),
+    ),
+    CourseRequirement(
+        group_id="", subject_id="LANG", periods_per_week=4, max_consecutive=2,
+        teacher_policy=TeacherPolicy.FIXED, teacher_id="T_LANG1",
+        preferred_periods=frozenset({1, 2, 3, 4, 5}),
+        forbidden_periods=frozenset({6}),
+    ),
+    CourseRequirement(
+        group_id="", subject_id="ENG", periods_per_week=3, max_consecutive=2,
+        teacher_policy=TeacherPolicy.FIXED, teacher_id="T_ENG1",
+        preferred_periods=frozenset({2, 3, 4, 5}),
+        forbidden_periods=None,
+    ),
+    CourseRequirement(
+        group_id="", subject_id="SCI", periods_per_week=3, max_consecutive=2,
+        teacher_policy=TeacherPolicy.FIXED, teacher_id="T_SCI1",
+        preferred_periods=frozenset({2, 3, 4, 5}),
+        forbidden_periods=frozenset({1, 6}),
+    ),
+    CourseRequirement(
+        group_id="", subject_id="HIST", periods_per_week=4, max_consecutive=2,
+        teacher_policy=TeacherPolicy.FIXED, teacher_id="T_HIST1",
+        preferred_periods=frozenset({1, 2, 3, 4, 5}),
+        forbidden_periods=frozenset({6}),
+    ),
+    CourseRequirement(
+        group_id="", subject_id="PE", periods_per_week=2, max_consecutive=2,
+        teacher_policy=TeacherPolicy.FIXED, teacher_id="T_PE1",
+        preferred_periods=frozenset({2, 3, 4, 5}),
+        forbidden_periods=frozenset({1, 6}),
+    ),
+    CourseRequirement(
+        group_id="", subject_id="TECH", periods_per_week=2, max_consecutive=2,
+        teacher_policy=TeacherPolicy.FIXED, teacher_id="T_TECH1",
+        preferred_periods=frozenset({2, 3, 4, 5}),
+        forbidden_periods=frozenset({1, 6}),
+    ),
+    CourseRequirement(
+        group_id="", subject_id="MUSIC", periods_per_week=1, max_consecutive=1,
+        teacher_policy=TeacherPolicy.FIXED, teacher_id="T_MUSIC1",
+        preferred_periods=frozenset({3, 4, 5}),
+        forbidden_periods=None,
+    ),
+    CourseRequirement(
+        group_id="", subject_id="ART", periods_per_week=2, max_consecutive=2,
+        teacher_policy=TeacherPolicy.FIXED, teacher_id="T_ART1",
+        preferred_periods=frozenset({2, 3, 4, 5}),
+        forbidden_periods=frozenset({6}),
+    ),
+    CourseRequirement(
+        group_id="", subject_id="TUTOR", periods_per_week=1, max_consecutive=1,
+        teacher_policy=TeacherPolicy.FIXED, teacher_id="T_TUTOR1",
+        preferred_periods=None,
+        forbidden_periods=frozenset({6}),
+    ),
+)
 
 
 def build_problem() -> TimetableProblem:
@@ -144,72 +213,7 @@ def build_problem() -> TimetableProblem:
     # Requirements (por grupo)
     # 27 sesiones/semana por grupo (<= 28 slots lectivos por bloqueos)
     # -------------------------
-    def reqs_for_group(gid: str) -> list[CourseRequirement]:
-        return [
-            CourseRequirement(
-                group_id=gid, subject_id="MATH", periods_per_week=5, max_consecutive=2,
-                teacher_policy=TeacherPolicy.CHOOSE,
-                teacher_pool=("T_MATH1", "T_MATH2"),
-                preferred_periods=frozenset({2, 3, 4, 5}),
-                forbidden_periods=frozenset({6}),
-            ),
-            CourseRequirement(
-                group_id=gid, subject_id="LANG", periods_per_week=4, max_consecutive=2,
-                teacher_policy=TeacherPolicy.FIXED, teacher_id="T_LANG1",
-                preferred_periods=frozenset({1, 2, 3, 4, 5}),
-                forbidden_periods=frozenset({6}),
-            ),
-            CourseRequirement(
-                group_id=gid, subject_id="ENG", periods_per_week=3, max_consecutive=2,
-                teacher_policy=TeacherPolicy.FIXED, teacher_id="T_ENG1",
-                preferred_periods=frozenset({2, 3, 4, 5}),
-                forbidden_periods=None,
-            ),
-            CourseRequirement(
-                group_id=gid, subject_id="SCI", periods_per_week=3, max_consecutive=2,
-                teacher_policy=TeacherPolicy.FIXED, teacher_id="T_SCI1",
-                preferred_periods=frozenset({2, 3, 4, 5}),
-                forbidden_periods=frozenset({1, 6}),
-            ),
-            CourseRequirement(
-                group_id=gid, subject_id="HIST", periods_per_week=4, max_consecutive=2,
-                teacher_policy=TeacherPolicy.FIXED, teacher_id="T_HIST1",
-                preferred_periods=frozenset({1, 2, 3, 4, 5}),
-                forbidden_periods=frozenset({6}),
-            ),
-            CourseRequirement(
-                group_id=gid, subject_id="PE", periods_per_week=2, max_consecutive=2,
-                teacher_policy=TeacherPolicy.FIXED, teacher_id="T_PE1",
-                preferred_periods=frozenset({2, 3, 4, 5}),
-                forbidden_periods=frozenset({1, 6}),
-            ),
-            CourseRequirement(
-                group_id=gid, subject_id="TECH", periods_per_week=2, max_consecutive=2,
-                teacher_policy=TeacherPolicy.FIXED, teacher_id="T_TECH1",
-                preferred_periods=frozenset({2, 3, 4, 5}),
-                forbidden_periods=frozenset({1, 6}),
-            ),
-            CourseRequirement(
-                group_id=gid, subject_id="MUSIC", periods_per_week=1, max_consecutive=1,
-                teacher_policy=TeacherPolicy.FIXED, teacher_id="T_MUSIC1",
-                preferred_periods=frozenset({3, 4, 5}),
-                forbidden_periods=None,
-            ),
-            CourseRequirement(
-                group_id=gid, subject_id="ART", periods_per_week=2, max_consecutive=2,
-                teacher_policy=TeacherPolicy.FIXED, teacher_id="T_ART1",
-                preferred_periods=frozenset({2, 3, 4, 5}),
-                forbidden_periods=frozenset({6}),
-            ),
-            CourseRequirement(
-                group_id=gid, subject_id="TUTOR", periods_per_week=1, max_consecutive=1,
-                teacher_policy=TeacherPolicy.FIXED, teacher_id="T_TUTOR1",
-                preferred_periods=None,
-                forbidden_periods=frozenset({6}),
-            ),
-        ]
-
-    requirements = tuple(req for g in groups for req in reqs_for_group(g.id))
+    requirements = tuple(replace(t, group_id=g.id) for g in groups for t in _REQ_TEMPLATES)
 
     # -------------------------
     # Config
@@ -238,86 +242,73 @@ def build_problem() -> TimetableProblem:
     )
 
 
-def pretty_print_solution(problem: TimetableProblem, sol) -> None:
-    # Mapa: event_id -> ScheduledEvent
-    ev_by_id = {se.event_id: se for se in sol.scheduled}
+_BLOCKED_CELL = "   [BLOQ]   "
+_FREE_CELL = "   (LIB)    "
+_CELL_FORMAT = "%-11.11s"  # rellena y recorta a ancho fijo (= ljust + slice)
+
 
+def pretty_print_solution(problem: TimetableProblem, sol) -> None:
     # Parse event_id "GROUP-SUBJECT-XX"
     def parse_event_id(eid: str) -> tuple[str, str]:
-        parts = eid.split("-")
         # group puede tener "_" pero no "-"
         # subject tampoco tiene "-"
-        return parts[0], parts[1]
-
-    # Construye (group -> (slot -> (subject, room)))
+        g, _, rest = eid.partition("-")
+        return g, rest.partition("-")[0]
+
+    # Las celdas se indexan por el bit del slot en el calendario (Calendar.slot_bit) y los bloqueos
+    # se consultan en una máscara: ni se construyen ni se hashean Slots por celda.
+    # Una sola pasada (y un solo parse_event_id) por evento para ambos horarios:
+    # group -> (slot bit -> "SUBJECT@ROOM") y teacher_id -> (slot bit -> "GROUP-SUBJECT@ROOM"),
+    # con el profesor según teacher_assignment del solver.
+    cal = problem.calendar
+    slot_bit = cal.slot_bit
+    teacher_of = sol.teacher_assignment.__getitem__
     by_group = defaultdict(dict)
-    for eid, se in ev_by_id.items():
-        g, sub = parse_event_id(eid)
-        by_group[g][se.slot] = (sub, se.room_id)
+    by_teacher = defaultdict(dict)
+    for se in sol.scheduled:
+        g, sub = parse_event_id(se.event_id)
+        bit = slot_bit(se.slot)
+        by_group[g][bit] = _CELL_FORMAT % f"{sub}@{se.room_id}"
+        by_teacher[teacher_of((g, sub))][bit] = _CELL_FORMAT % f"{g}-{sub}@{se.room_id}"
 
     # Imprime por grupo
-    days = problem.calendar.days
-    ppd = problem.calendar.periods_per_day
-    blocked = problem.calendar.blocked_slots
+    days = cal.days
+    ppd = cal.periods_per_day
+    blocked_mask = cal.slots_mask(cal.blocked_slots)
+    # (bit, bloqueado) de cada slot por día, calculados una vez para grupos y profesores
+    week = []
+    for d in days:
+        bits = [slot_bit(Slot(d, p)) for p in range(1, ppd + 1)]
+        week.append((d, [(bit, bool((blocked_mask >> bit) & 1)) for bit in bits]))
 
-    print("\n" + "=" * 90)
-    print("HORARIOS POR GRUPO")
-    print("=" * 90)
+    lines = ["", "=" * 90, "HORARIOS POR GRUPO", "=" * 90]
 
     for g in problem.groups:
-        print(f"\n--- {g.id} (size={g.size}) ---")
-        for d in days:
-            row = []
-            for p in range(1, ppd + 1):
-                slot = Slot(d, p)
-                if slot in blocked:
-                    row.append("   [BLOQ]   ")
-                else:
-                    item = by_group[g.id].get(slot)
-                    if not item:
-                        row.append("   (LIB)    ")
-                    else:
-                        sub, rid = item
-                        row.append(f"{sub}@{rid}".ljust(11)[:11])
-            print(f"{d}: " + " | ".join(row))
+        lines.append("")
+        lines.append(f"--- {g.id} (size={g.size}) ---")
+        cells = by_group[g.id]
+        for d, day_slots in week:
+            row = [_BLOCKED_CELL if blocked else cells.get(bit, _FREE_CELL) for bit, blocked in day_slots]
+            lines.append(f"{d}: " + " | ".join(row))
 
     # Horario por profesor (según teacher_assignment)
-    print("\n" + "=" * 90)
-    print("HORARIOS POR PROFESOR (según teacher_assignment del solver)")
-    print("=" * 90)
-
-    # (group,subject) -> teacher_id
-    ta = sol.teacher_assignment
-
-    # Mapa: teacher_id -> (slot -> "GROUP-SUBJECT@ROOM")
-    by_teacher = defaultdict(dict)
-
-    for eid, se in ev_by_id.items():
-        g, sub = parse_event_id(eid)
-        tid = ta[(g, sub)]
-        by_teacher[tid][se.slot] = f"{g}-{sub}@{se.room_id}"
+    lines += ["", "=" * 90, "HORARIOS POR PROFESOR (según teacher_assignment del solver)", "=" * 90]
 
     for t in problem.teachers:
-        print(f"\n--- {t.id} ---")
-        for d in days:
-            row = []
-            for p in range(1, ppd + 1):
-                slot = Slot(d, p)
-                if slot in blocked:
-                    row.append("   [BLOQ]   ")
-                else:
-                    item = by_teacher[t.id].get(slot)
-                    if not item:
-                        row.append("   (LIB)    ")
-                    else:
-                        row.append(item.ljust(11)[:11])
-            print(f"{d}: " + " | ".join(row))
-
-    print("\n" + "=" * 90)
-    print("OBJETIVO")
-    print("=" * 90)
-    print("objective_value:", sol.objective_value)
-    print("objective_breakdown:", sol.objective_breakdown)
+        lines.append("")
+        lines.append(f"--- {t.id} ---")
+        cells = by_teacher[t.id]
+        for d, day_slots in week:
+            row = [_BLOCKED_CELL if blocked else cells.get(bit, _FREE_CELL) for bit, blocked in day_slots]
+            lines.append(f"{d}: " + " | ".join(row))
+
+    lines += [
+        "", "=" * 90, "OBJETIVO", "=" * 90,
+        f"objective_value: {sol.objective_value}",
+        f"objective_breakdown: {sol.objective_breakdown}",
+    ]
+    # Una sola escritura en vez de un print por fila.
+    sys.stdout.write("\n".join(lines) + "\n")
 
 
 def main():
@@ -1,36 +1,43 @@
 # solver/glpk_solve.py
 from __future__ import annotations
 
+import io
 import os
 import re
 import shutil
 import subprocess
+import threading
 from dataclasses import dataclass
-from typing import Dict, List, Tuple, Iterable, Optional, DefaultDict
+from typing import IO, Dict, List, Tuple, Iterable, Optional, DefaultDict, Sequence
 from collections import defaultdict
+from itertools import chain
 
-from solver.schema import (
+from app.domain.core.schema import (
     TimetableProblem,
     TimetableSolution,
     ScheduledEvent,
     Slot,
     TeacherKey,
+    TeacherPolicy,
 )
-from solver.solve import _compile_problem  # reutilizamos tu compilación interna
+from app.domain.solver.compile import compile_problem  # reutilizamos la compilación del solver
 
 
 # -----------------------------
 # Utilidades LP (GLPK)
 # -----------------------------
 
-def _sanitize(name: str) -> str:
-    # LP/GLPK agradece nombres simples: [A-Za-z0-9_]
-    return re.sub(r"[^A-Za-z0-9_]", "_", name)
+# buffer de escritura del fichero LP (son varios MB en problemas grandes)
+_LP_WRITE_BUFFER = 1 << 20
+
+# nombre de columna tal y como lo escribe _LPModel.add_var
+_COL_NAME_RE = re.compile(r"x\d+")
+_NUM_RE = re.compile(r"[-+]?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?")
 
 
 @dataclass(frozen=True)
 class _VarRef:
-    name: str
+    idx: int   # columna 1..n en orden de creación; en el LP se escribe como x<idx>
     kind: str  # "B" binaria, "I" entera, "C" continua
     lb: Optional[int] = None
     ub: Optional[int] = None
@@ -38,69 +45,88 @@ class _VarRef:
 
 class _LPModel:
     def __init__(self) -> None:
-        self.vars: Dict[str, _VarRef] = {}
-        self.constraints: List[str] = []
-        self.objective_terms: List[str] = []  # ya en texto LP
+        self.vars: List[_VarRef] = []
         self.obj_name = "obj"
-
-    def add_var(self, v: _VarRef) -> None:
-        if v.name in self.vars:
-            return
-        self.vars[v.name] = v
-
-    def add_constr(self, expr: str) -> None:
-        # expr debe ser tipo: "c1: ... = 1" / "<= 1" / ">= -1"
-        self.constraints.append(expr)
-
-    def add_obj_term(self, term: str) -> None:
-        # term ya en LP: " + 3 x" o " + 5 y"
-        self.objective_terms.append(term)
-
-    def to_lp(self) -> str:
-        out: List[str] = []
-        out.append("Minimize")
-        if self.objective_terms:
-            out.append(f" {self.obj_name}: " + "".join(self.objective_terms).lstrip())
-        else:
-            out.append(f" {self.obj_name}: 0")
-        out.append("Subject To")
-        out.extend(f" {c}" for c in self.constraints)
-
-        # Bounds (para enteras como excess)
-        bounds_lines: List[str] = []
-        for v in self.vars.values():
-            if v.lb is not None or v.ub is not None:
-                lb = v.lb if v.lb is not None else 0
-                if v.ub is None:
-                    bounds_lines.append(f" {lb} <= {v.name}")
-                else:
-                    bounds_lines.append(f" {lb} <= {v.name} <= {v.ub}")
-        if bounds_lines:
-            out.append("Bounds")
-            out.extend(bounds_lines)
-
-        # Generals (enteras)
-        generals = [v.name for v in self.vars.values() if v.kind == "I"]
-        if generals:
-            out.append("Generals")
-            out.append(" " + " ".join(generals))
-
-        # Binaries
-        binaries = [v.name for v in self.vars.values() if v.kind == "B"]
-        if binaries:
-            out.append("Binary")
-            # partir por líneas para no hacer líneas gigantes
-            chunk = []
-            for b in binaries:
-                chunk.append(b)
-                if len(chunk) >= 12:
-                    out.append(" " + " ".join(chunk))
-                    chunk = []
-            if chunk:
-                out.append(" " + " ".join(chunk))
-
-        out.append("End")
-        return "\n".join(out) + "\n"
+        # Cada sección del LP se va escribiendo en su propio buffer (líneas ya
+        # terminadas en "\n") al añadir variables/restricciones; to_lp las vuelca.
+        self._obj: Dict[str, int] = {}    # columna -> coeficiente (cada columna una sola vez)
+        self._cons: List[str] = []        # filas " c<id>: ... <sense> <rhs>\n"
+        self._bounds: List[str] = []
+        self._bounded: List[str] = []
+        self._ints: List[str] = []
+        self._bins: List[str] = []
+        self._cid = 1
+        # columnas en el orden en que aparecen por primera vez en las filas
+        self._row_cols: Dict[str, None] = {}
+
+    def add_var(self, kind: str, lb: Optional[int] = None, ub: Optional[int] = None) -> str:
+        """
+        Crea una columna y devuelve su nombre en el LP ("x<idx>").
+        Nombres cortos: nada que sanear y el reporte de glpsol no parte las filas.
+        """
+        v = _VarRef(len(self.vars) + 1, kind, lb, ub)
+        self.vars.append(v)
+        name = f"x{v.idx}"
+        if lb is not None or ub is not None:
+            self._bounded.append(name)
+            if ub is None:
+                self._bounds.append(f" {lb} <= {name}\n")
+            else:
+                self._bounds.append(f" {lb if lb is not None else 0} <= {name} <= {ub}\n")
+        if kind == "I":
+            self._ints.append(name)
+        elif kind == "B":
+            self._bins.append(name)
+        return name
+
+    def add_constr(
+        self, lhs_terms: Sequence[str], sense: str, rhs: object, minus_terms: Sequence[str] = ()
+    ) -> None:
+        # fila: "c<id>: t1 + t2 ... - m1 - m2 ... <sense> <rhs>", con sense en {"=", "<=", ">="}
+        # (el formato LP no admite paréntesis: las restas van término a término)
+        lhs = " + ".join(lhs_terms)
+        minus = " - ".join(minus_terms)
+        if minus:
+            lhs = f"{lhs} - {minus}"
+        self._cons.append(f" c{self._cid}: {lhs} {sense} {rhs}\n")
+        self._cid += 1
+        self._row_cols.update(dict.fromkeys(lhs_terms))
+        self._row_cols.update(dict.fromkeys(minus_terms))
+
+    def add_obj_term(self, var: str, coef: int) -> None:
+        # GLPK no admite repetir una variable en el objetivo: se acumula el coeficiente
+        self._obj[var] = self._obj.get(var, 0) + coef
+
+    def columns(self) -> List[str]:
+        """
+        Nombres de columna en la numeración de GLPK (la columna j es columns()[j - 1]).
+        El lector LP de GLPK numera las columnas según aparecen por primera vez en el
+        fichero: objetivo, filas, Bounds, Generals y Binary, en ese orden.
+        """
+        return list(dict.fromkeys(chain(self._obj, self._row_cols, self._bounded, self._ints, self._bins)))
+
+    def to_lp(self, fh: IO[str]) -> None:
+        # Escribe sección a sección sobre fh, sin montar el LP entero en memoria.
+        write = fh.write
+        obj = " + ".join(f"{coef} {var}" for var, coef in self._obj.items()) or "0"
+        write(f"Minimize\n {self.obj_name}: {obj}\nSubject To\n")
+        fh.writelines(self._cons)
+        if self._bounds:
+            write("Bounds\n")
+            fh.writelines(self._bounds)
+        if self._ints:
+            write("Generals\n " + " ".join(self._ints) + "\n")
+        if self._bins:
+            # partir por líneas de 12 para no hacer líneas gigantes
+            bins = self._bins
+            write("Binary\n")
+            fh.writelines(" " + " ".join(bins[i:i + 12]) + "\n" for i in range(0, len(bins), 12))
+        write("End\n")
+
+    def to_lp_str(self) -> str:
+        buf = io.StringIO()
+        self.to_lp(buf)
+        return buf.getvalue()
 
 
 # -----------------------------
@@ -110,7 +136,7 @@ class _LPModel:
 @dataclass
 class _BuiltMILP:
     lp: _LPModel
-    # mapeos para reconstruir solución:
+    # mapeos para reconstruir solución (el LP solo lleva nombres x<idx>):
     z_name: Dict[Tuple[str, int, str], str]          # (event_id, si, rid) -> varname
     a_name: Dict[Tuple[TeacherKey, str], str]        # (k, tid) -> varname
     slots: Tuple[Slot, ...]
@@ -118,7 +144,7 @@ class _BuiltMILP:
 
 
 def build_glpk_lp(problem: TimetableProblem) -> _BuiltMILP:
-    c = _compile_problem(problem)
+    c = compile_problem(problem)
     cal = problem.calendar
     teachers = problem.index_teachers()
     rooms = problem.index_rooms()
@@ -127,62 +153,69 @@ def build_glpk_lp(problem: TimetableProblem) -> _BuiltMILP:
     lp = _LPModel()
 
     # --- Variable principal: z[e,si,rid] binaria SOLO en combos permitidos y disponibles
+    n_slots = len(c.slots)
+    keys = list(c.key_pools.keys())
+    event_key: Dict[str, TeacherKey] = dict(c.event_req_key)
+
+    # índices densos por grupo/aula/key: las agrupaciones por (x, si) son listas
+    # planas con la celda en [idx * n_slots + si]
+    group_idx: Dict[str, int] = {}
+    for e in c.events:
+        group_idx.setdefault(e.group_id, len(group_idx))
+    room_idx: Dict[str, int] = {rid: i for i, rid in enumerate(rooms)}
+    key_idx: Dict[TeacherKey, int] = {k: i for i, k in enumerate(keys)}
+
     z_name: Dict[Tuple[str, int, str], str] = {}
     z_by_event: DefaultDict[str, List[str]] = defaultdict(list)
-    z_by_group_slot: DefaultDict[Tuple[str, int], List[str]] = defaultdict(list)
-    z_by_room_slot: DefaultDict[Tuple[str, int], List[str]] = defaultdict(list)
-    z_by_key_slot: DefaultDict[Tuple[TeacherKey, int], List[str]] = defaultdict(list)
+    z_by_group_slot: List[List[str]] = [[] for _ in range(len(group_idx) * n_slots)]
+    z_by_room_slot: List[List[str]] = [[] for _ in range(len(room_idx) * n_slots)]
+    z_by_key_slot: List[List[str]] = [[] for _ in range(len(key_idx) * n_slots)]
 
-    # agrupaciones útiles
-    events_by_group: DefaultDict[str, List[str]] = defaultdict(list)
-    event_key: Dict[str, TeacherKey] = dict(c.event_req_key)
+    # disponibilidad aula x slot, calculada una vez: room_avail[rid][si]
+    room_avail: Dict[str, List[bool]] = {
+        rid: [r.is_available(slot) for slot in c.slots] for rid, r in rooms.items()
+    }
 
     for e in c.events:
-        events_by_group[e.group_id].append(e.id)
+        ev_terms = z_by_event[e.id]
+        g_base = group_idx[e.group_id] * n_slots
+        k_base = key_idx[event_key[e.id]] * n_slots
+        ev_rooms = [(rid, room_idx[rid] * n_slots, room_avail[rid]) for rid in c.allowed_rooms[e.id]]
 
         for si in c.allowed_slots[e.id]:
-            slot = c.slots[si]
-            for rid in c.allowed_rooms[e.id]:
-                if not rooms[rid].is_available(slot):
+            for rid, r_base, avail in ev_rooms:
+                if not avail[si]:
                     continue
 
-                vname = _sanitize(f"z__{e.id}__s{si}__r{rid}")
-                lp.add_var(_VarRef(vname, "B"))
+                vname = lp.add_var("B")
                 z_name[(e.id, si, rid)] = vname
 
-                z_by_event[e.id].append(vname)
-                z_by_group_slot[(e.group_id, si)].append(vname)
-                z_by_room_slot[(rid, si)].append(vname)
-                z_by_key_slot[(event_key[e.id], si)].append(vname)
+                ev_terms.append(vname)
+                z_by_group_slot[g_base + si].append(vname)
+                z_by_room_slot[r_base + si].append(vname)
+                z_by_key_slot[k_base + si].append(vname)
 
     # 1) Cada evento exactamente una vez
-    cid = 1
     for e in c.events:
         terms = z_by_event[e.id]
         if not terms:
             raise ValueError(f"Evento {e.id}: no tiene ninguna combinación (slot,room) válida.")
-        lp.add_constr(f"c{cid}: " + " + ".join(terms) + " = 1")
-        cid += 1
+        lp.add_constr(terms, "=", 1)
 
     # 2) Conflicto de grupo: a lo sumo 1 clase por (grupo, slot)
-    for g_id, ev_ids in events_by_group.items():
-        for si in range(len(c.slots)):
-            terms = z_by_group_slot.get((g_id, si), [])
-            if terms:
-                lp.add_constr(f"c{cid}: " + " + ".join(terms) + " <= 1")
-                cid += 1
+    for terms in z_by_group_slot:
+        if terms:
+            lp.add_constr(terms, "<=", 1)
 
     # 3) Conflicto de aula: a lo sumo 1 clase por (room, slot)
-    for rid in rooms.keys():
-        for si in range(len(c.slots)):
-            terms = z_by_room_slot.get((rid, si), [])
-            if terms:
-                lp.add_constr(f"c{cid}: " + " + ".join(terms) + " <= 1")
-                cid += 1
+    for terms in z_by_room_slot:
+        if terms:
+            lp.add_constr(terms, "<=", 1)
 
     # --- Asignación de profesor por key: a[k,tid]
-    keys = list(c.key_pools.keys())
     a_name: Dict[Tuple[TeacherKey, str], str] = {}
+    # profesores que pueden acabar dando la key (con FIXED, solo el fijado)
+    teach_pool: Dict[TeacherKey, Tuple[str, ...]] = {}
 
     for k in keys:
         pool = c.key_pools[k]
@@ -191,129 +224,144 @@ def build_glpk_lp(problem: TimetableProblem) -> _BuiltMILP:
 
         a_vars: List[str] = []
         for tid in pool:
-            vname = _sanitize(f"a__{k[0]}__{k[1]}__{tid}")
-            lp.add_var(_VarRef(vname, "B"))
+            vname = lp.add_var("B")
             a_name[(k, tid)] = vname
             a_vars.append(vname)
 
-        lp.add_constr(f"c{cid}: " + " + ".join(a_vars) + " = 1")
-        cid += 1
+        lp.add_constr(a_vars, "=", 1)
 
         # FIXED: fuerza exacta
         req = c.req_by_key[k]
-        if str(req.teacher_policy) == "TeacherPolicy.FIXED":
+        teach_pool[k] = pool
+        if req.teacher_policy == TeacherPolicy.FIXED:
             fixed = req.teacher_id
             if fixed is None:
                 raise ValueError(f"teacher_policy=FIXED pero teacher_id=None para {k}")
-            for tid in pool:
+            for tid, a_var in zip(pool, a_vars):
                 # a_var = 1 si coincide, si no 0
                 val = 1 if tid == fixed else 0
-                lp.add_constr(f"c{cid}: {a_name[(k, tid)]} = {val}")
-                cid += 1
+                lp.add_constr((a_var,), "=", val)
+            teach_pool[k] = tuple(tid for tid in pool if tid == fixed)
 
     # --- occ[k,si] binaria: hay clase de esa (group,subject) en ese slot
-    occ_name: Dict[Tuple[TeacherKey, int], str] = {}
+    # (occ_vars[k][si]; igual que busy_vars[tid][si] más abajo: listas por slot
+    # en vez de dicts por tupla). None = la key no puede caer en ese slot
+    # (no hay ningún z): occ vale 0 y no se crea columna.
+    occ_vars: Dict[TeacherKey, List[Optional[str]]] = {}
     slots_by_day: DefaultDict[str, List[int]] = defaultdict(list)
     for si, s in enumerate(c.slots):
         slots_by_day[s.day].append(si)
-
-    for k in keys:
-        for si in range(len(c.slots)):
-            vname = _sanitize(f"occ__{k[0]}__{k[1]}__s{si}")
-            lp.add_var(_VarRef(vname, "B"))
-            occ_name[(k, si)] = vname
-
-            terms = z_by_key_slot.get((k, si), [])
+    # (day, period) -> si; los slots bloqueados no están
+    si_by_day_period: Dict[Tuple[str, int], int] = {(s.day, s.period): si for si, s in enumerate(c.slots)}
+
+    for ki, k in enumerate(keys):
+        k_base = ki * n_slots
+        occ_k = occ_vars[k] = []
+        for si in range(n_slots):
+            terms = z_by_key_slot[k_base + si]
             if not terms:
-                lp.add_constr(f"c{cid}: {vname} = 0")
-                cid += 1
-            else:
-                # robustez: sum z <= 1
-                lp.add_constr(f"c{cid}: " + " + ".join(terms) + " <= 1")
-                cid += 1
-                # occ = sum z
-                lp.add_constr(f"c{cid}: {vname} - (" + " + ".join(terms) + ") = 0")
-                cid += 1
-
-    # --- teach[k,tid,si] binaria con linearización AND, y disponibilidad
-    teach_name: Dict[Tuple[TeacherKey, str, int], str] = {}
+                occ_k.append(None)
+                continue
+
+            vname = lp.add_var("B")
+            occ_k.append(vname)
+            # robustez: sum z <= 1
+            lp.add_constr(terms, "<=", 1)
+            # occ = sum z
+            lp.add_constr((vname,), "=", 0, terms)
+
+    # --- teach[k,tid,si] = a[k,tid] AND occ[k,si], agregado por (tid, si) para busy.
+    # Solo se crea la variable cuando hace falta:
+    # - si la key tiene un único profesor posible, a = 1 y teach = occ;
+    # - si el profesor no está disponible en el slot, basta con a + occ <= 1.
+    teach_terms: Dict[str, List[List[str]]] = {tid: [[] for _ in range(n_slots)] for tid in teachers}
+    # disponibilidad profesor x slot, calculada una vez: teacher_avail[tid][si]
+    teacher_avail: Dict[str, List[bool]] = {
+        tid: [t.is_available(slot) for slot in c.slots] for tid, t in teachers.items()
+    }
     for k in keys:
-        pool = c.key_pools[k]
+        pool = teach_pool[k]
+        occ_k = occ_vars[k]
         for tid in pool:
-            t = teachers[tid]
+            avail = teacher_avail[tid]
             a_var = a_name[(k, tid)]
-            for si, slot in enumerate(c.slots):
-                vname = _sanitize(f"teach__{k[0]}__{k[1]}__{tid}__s{si}")
-                lp.add_var(_VarRef(vname, "B"))
-                teach_name[(k, tid, si)] = vname
+            terms_t = teach_terms[tid]
+            for si in range(n_slots):
+                occ_var = occ_k[si]
+                if occ_var is None:
+                    continue  # occ = 0 => teach = 0
+                if not avail[si]:
+                    # disponibilidad
+                    lp.add_constr((a_var, occ_var), "<=", 1)
+                    continue
+                if len(pool) == 1:
+                    terms_t[si].append(occ_var)
+                    continue
 
-                occ_var = occ_name[(k, si)]
+                vname = lp.add_var("B")
+                terms_t[si].append(vname)
                 # v <= a
-                lp.add_constr(f"c{cid}: {vname} - {a_var} <= 0"); cid += 1
+                lp.add_constr((vname,), "<=", 0, (a_var,))
                 # v <= occ
-                lp.add_constr(f"c{cid}: {vname} - {occ_var} <= 0"); cid += 1
+                lp.add_constr((vname,), "<=", 0, (occ_var,))
                 # v >= a + occ - 1  <=>  v - a - occ >= -1
-                lp.add_constr(f"c{cid}: {vname} - {a_var} - {occ_var} >= -1"); cid += 1
-
-                # disponibilidad
-                if not t.is_available(slot):
-                    lp.add_constr(f"c{cid}: {vname} = 0"); cid += 1
+                lp.add_constr((vname,), ">=", -1, (a_var, occ_var))
 
     # --- busy[tid,si] binaria + choque profe
-    busy_name: Dict[Tuple[str, int], str] = {}
+    busy_vars: Dict[str, List[str]] = {}
     for tid in teachers.keys():
-        for si in range(len(c.slots)):
-            vname = _sanitize(f"busy__{tid}__s{si}")
-            lp.add_var(_VarRef(vname, "B"))
-            busy_name[(tid, si)] = vname
+        busy_t = busy_vars[tid] = []
+        for terms in teach_terms[tid]:
+            vname = lp.add_var("B")
+            busy_t.append(vname)
 
-            terms = [teach_name[(k, tid, si)] for k in keys if (k, tid, si) in teach_name]
             if not terms:
-                lp.add_constr(f"c{cid}: {vname} = 0"); cid += 1
+                lp.add_constr((vname,), "=", 0)
             else:
-                # busy = sum teach
-                lp.add_constr(f"c{cid}: {vname} - (" + " + ".join(terms) + ") = 0"); cid += 1
-                # choque: sum teach <= 1
-                lp.add_constr(f"c{cid}: " + " + ".join(terms) + " <= 1"); cid += 1
+                # busy = sum teach; al ser busy binaria esto ya impide el choque (sum teach <= 1)
+                lp.add_constr((vname,), "=", 0, terms)
 
     # Límites max_periods_per_day/week (hard)
     for tid, t in teachers.items():
+        busy_t = busy_vars[tid]
         if t.max_periods_per_day is not None:
             for d, silist in slots_by_day.items():
                 if silist:
-                    lp.add_constr(
-                        f"c{cid}: " + " + ".join(busy_name[(tid, si)] for si in silist)
-                        + f" <= {int(t.max_periods_per_day)}"
-                    )
-                    cid += 1
+                    lp.add_constr([busy_t[si] for si in silist], "<=", int(t.max_periods_per_day))
         if t.max_periods_per_week is not None:
-            lp.add_constr(
-                f"c{cid}: " + " + ".join(busy_name[(tid, si)] for si in range(len(c.slots)))
-                + f" <= {int(t.max_periods_per_week)}"
-            )
-            cid += 1
+            lp.add_constr(busy_t, "<=", int(t.max_periods_per_week))
 
     # -----------------------------
     # Restricciones específicas (hard)
     # -----------------------------
 
     # max_consecutive por key (como en tu CP-SAT; equivalente)
+    # ventanas de m+1 periodos seguidos de cada día: solo dependen de m, se calculan
+    # una vez por valor distinto de max_consecutive y las comparten todas las keys
+    windows_by_m: Dict[int, List[List[int]]] = {}
     for k, req in c.req_by_key.items():
         m = req.max_consecutive
         if m is None or m < 1:
             continue
-        for d in cal.days:
-            silist = sorted(slots_by_day.get(d, []), key=lambda si: c.slots[si].period)
-            if not silist:
-                continue
-            for start_p in range(1, cal.periods_per_day - m + 1):
-                window = [si for si in silist if start_p <= c.slots[si].period <= start_p + m]
-                if window:
-                    lp.add_constr(
-                        f"c{cid}: " + " + ".join(occ_name[(k, si)] for si in window)
-                        + f" <= {int(m)}"
-                    )
-                    cid += 1
+        windows = windows_by_m.get(m)
+        if windows is None:
+            windows = windows_by_m[m] = []
+            for d in cal.days:
+                for start_p in range(1, cal.periods_per_day - m + 1):
+                    window = [
+                        si_by_day_period[d, p]
+                        for p in range(start_p, start_p + m + 1)
+                        if (d, p) in si_by_day_period
+                    ]
+                    if window:
+                        windows.append(window)
+
+        occ_k = occ_vars[k]
+        for window in windows:
+            terms = [occ_k[si] for si in window if occ_k[si] is not None]
+            # con m términos o menos la fila se cumple sola
+            if len(terms) > m:
+                lp.add_constr(terms, "<=", int(m))
 
     # Subject.max_per_day (hard)
     subj_by_id = problem.index_subjects()
@@ -322,89 +370,87 @@ def build_glpk_lp(problem: TimetableProblem) -> _BuiltMILP:
         maxpd = subj_by_id[sub_id].max_per_day
         if maxpd is None:
             continue
+        occ_k = occ_vars[k]
         for d in cal.days:
-            silist = slots_by_day.get(d, [])
-            if silist:
-                lp.add_constr(
-                    f"c{cid}: " + " + ".join(occ_name[(k, si)] for si in silist)
-                    + f" <= {int(maxpd)}"
-                )
-                cid += 1
+            terms = [occ_k[si] for si in slots_by_day.get(d, []) if occ_k[si] is not None]
+            if len(terms) > maxpd:
+                lp.add_constr(terms, "<=", int(maxpd))
 
     # -----------------------------
     # Objetivo (soft) igual que tu CP-SAT
     # -----------------------------
 
+    # periodo de cada slot, para probarlo contra preferred_mask/forbidden_mask
+    slot_periods: List[int] = [s.period for s in c.slots]
+
     # forbidden soft si no es hard
     forbidden_soft_terms: List[str] = []
     if not problem.config.forbidden_periods_hard:
         for k, req in c.req_by_key.items():
             if not req.forbidden_periods:
                 continue
-            forb = set(req.forbidden_periods)
-            for si, slot in enumerate(c.slots):
-                if slot.period in forb:
-                    forbidden_soft_terms.append(occ_name[(k, si)])
+            forb = req.forbidden_mask
+            occ_k = occ_vars[k]
+            forbidden_soft_terms.extend(
+                occ_k[si] for si, p in enumerate(slot_periods) if (forb >> p) & 1 and occ_k[si] is not None
+            )
 
     # 1) gaps profesores: gap >= prev + next - cur - 1
     if weights.teacher_gaps:
+        # ventanas (prev, cur, next) de periodos seguidos sin bloqueos: no dependen del profesor
+        gap_windows: List[Tuple[int, int, int]] = []
+        for d in cal.days:
+            for p in range(2, cal.periods_per_day):
+                si_prev = si_by_day_period.get((d, p - 1))
+                si_cur = si_by_day_period.get((d, p))
+                si_next = si_by_day_period.get((d, p + 1))
+                if si_prev is not None and si_cur is not None and si_next is not None:
+                    gap_windows.append((si_prev, si_cur, si_next))
+
+        gap_weight = int(weights.teacher_gaps)
         for tid in teachers.keys():
-            for d in cal.days:
-                silist = sorted(slots_by_day.get(d, []), key=lambda si: c.slots[si].period)
-                for p in range(2, cal.periods_per_day):
-                    si_prev = next((si for si in silist if c.slots[si].period == p - 1), None)
-                    si_cur = next((si for si in silist if c.slots[si].period == p), None)
-                    si_next = next((si for si in silist if c.slots[si].period == p + 1), None)
-                    if si_prev is None or si_cur is None or si_next is None:
-                        continue
-                    gvar = _sanitize(f"gap__{tid}__{d}__p{p}")
-                    lp.add_var(_VarRef(gvar, "B"))
-                    # gvar - prev - next + cur >= -1
-                    lp.add_constr(
-                        f"c{cid}: {gvar} - {busy_name[(tid, si_prev)]} - {busy_name[(tid, si_next)]} + {busy_name[(tid, si_cur)]} >= -1"
-                    )
-                    cid += 1
-                    lp.add_obj_term(f" + {int(weights.teacher_gaps)} {gvar}")
+            busy_t = busy_vars[tid]
+            for si_prev, si_cur, si_next in gap_windows:
+                gvar = lp.add_var("B")
+                # gvar - prev - next + cur >= -1
+                lp.add_constr((gvar, busy_t[si_cur]), ">=", -1, (busy_t[si_prev], busy_t[si_next]))
+                lp.add_obj_term(gvar, gap_weight)
 
     # 2) última hora profe
     if weights.teacher_late:
         for tid in teachers.keys():
             for d in cal.days:
-                si_last = next(
-                    (si for si in slots_by_day.get(d, []) if c.slots[si].period == cal.periods_per_day),
-                    None
-                )
+                si_last = si_by_day_period.get((d, cal.periods_per_day))
                 if si_last is not None:
-                    lp.add_obj_term(f" + {int(weights.teacher_late)} {busy_name[(tid, si_last)]}")
+                    lp.add_obj_term(busy_vars[tid][si_last], int(weights.teacher_late))
 
     # 3) repetir misma asignatura el mismo día (excess): ex >= cnt - 1
     if weights.subject_same_day_excess:
         for k in keys:
+            occ_k = occ_vars[k]
             for d in cal.days:
-                silist = slots_by_day.get(d, [])
-                if not silist:
-                    continue
-                ex = _sanitize(f"excess__{k[0]}__{k[1]}__{d}")
-                lp.add_var(_VarRef(ex, "I", lb=0, ub=int(cal.periods_per_day)))
-                cnt_expr = " + ".join(occ_name[(k, si)] for si in silist)
-                lp.add_constr(f"c{cid}: {ex} - ({cnt_expr}) >= -1")
-                cid += 1
-                lp.add_obj_term(f" + {int(weights.subject_same_day_excess)} {ex}")
+                terms = [occ_k[si] for si in slots_by_day.get(d, []) if occ_k[si] is not None]
+                if len(terms) < 2:
+                    continue  # cnt - 1 <= 0: nunca hay exceso
+                ex = lp.add_var("I", lb=0, ub=int(cal.periods_per_day))
+                lp.add_constr((ex,), ">=", -1, terms)
+                lp.add_obj_term(ex, int(weights.subject_same_day_excess))
 
     # 4) preferred_periods penalty (si slot.period no está en preferred)
     if weights.preferred_period_penalty:
         for k, req in c.req_by_key.items():
             if not req.preferred_periods:
                 continue
-            pref = set(req.preferred_periods)
-            for si, slot in enumerate(c.slots):
-                if slot.period not in pref:
-                    lp.add_obj_term(f" + {int(weights.preferred_period_penalty)} {occ_name[(k, si)]}")
+            pref = req.preferred_mask
+            occ_k = occ_vars[k]
+            for si, p in enumerate(slot_periods):
+                if not (pref >> p) & 1 and occ_k[si] is not None:
+                    lp.add_obj_term(occ_k[si], int(weights.preferred_period_penalty))
 
     # 5) forbidden_periods soft
     if weights.forbidden_period_penalty and forbidden_soft_terms:
         for v in forbidden_soft_terms:
-            lp.add_obj_term(f" + {int(weights.forbidden_period_penalty)} {v}")
+            lp.add_obj_term(v, int(weights.forbidden_period_penalty))
 
     return _BuiltMILP(lp=lp, z_name=z_name, a_name=a_name, slots=c.slots, keys=keys)
 
@@ -415,53 +461,116 @@ def build_glpk_lp(problem: TimetableProblem) -> _BuiltMILP:
 
 def _parse_glpsol_report_for_values(report_text: str) -> Dict[str, float]:
     """
-    Parser tolerante para el reporte (-o) de glpsol:
-    busca la tabla de columnas y extrae "Activity" por variable.
+    Parser para el reporte (-o) de glpsol: busca la tabla de columnas y extrae
+    "Activity" por variable. solve_with_glpk ya lee el fichero de --write; esto
+    queda para reportes generados a mano.
 
-    Si tu versión de GLPK cambia el formato, este parser puede necesitar ajuste,
-    pero suele funcionar bien.
+    Las filas de la tabla tienen posiciones fijas:
+        No.  Column name  [*|St]  Activity  Lower bound  Upper bound ...
+    ("*" marca columnas enteras en MIP; St es el estado en un LP continuo).
     """
     values: Dict[str, float] = {}
 
-    # Heurística: localizar sección "Column name" típica
-    # y capturar líneas con: <idx> <name> <something> <activity> ...
-    # Usamos regex flexible.
-    lines = report_text.splitlines()
-
     in_cols = False
-    for line in lines:
+    for line in report_text.splitlines():
         if "Column name" in line and "Activity" in line:
             in_cols = True
             continue
-        if in_cols:
-            if not line.strip():
-                continue
-            # fin de tabla al encontrar "Row name" u otra cabecera
-            if "Row name" in line and "Activity" in line:
-                break
-
-            # ejemplo típico (puede variar):
-            #  123 z__...  NL  1
-            parts = line.split()
-            if len(parts) < 3:
-                continue
+        if not in_cols:
+            continue
+        # fin de tabla al encontrar "Row name" u otra cabecera
+        if "Row name" in line and "Activity" in line:
+            break
+
+        # ejemplo típico:
+        #     17 x17          *              1             0             1
+        parts = line.split()
+        if len(parts) < 3 or not _COL_NAME_RE.fullmatch(parts[1]):
+            continue
+        # la actividad es el primer número tras el nombre (saltando "*" / estado)
+        activity = parts[2] if _NUM_RE.fullmatch(parts[2]) else (parts[3] if len(parts) > 3 else "")
+        if _NUM_RE.fullmatch(activity):
+            values[parts[1]] = float(activity)
+
+    return values
+
+
+def _read_glpsol_solution(lines: Iterable[str], columns: List[str], source: str) -> Dict[str, float]:
+    """
+    Lee la solución MIP que escribe `glpsol --write` (formato de texto de GLPK):
+
+        s mip <filas> <columnas> <estado> <objetivo>
+        i <fila> <valor>
+        j <columna> <valor>
+
+    Las columnas vienen numeradas como en _LPModel.columns().
+    """
+    values: Dict[str, float] = {}
+    for line in lines:
+        if line.startswith("j "):
+            _, j, val = line.split()
+            values[columns[int(j) - 1]] = float(val)
+        elif line.startswith("s "):
+            # o = óptima, f = factible; cualquier otra cosa es que no hay solución entera
+            status = line.split()[4]
+            if status not in ("o", "f"):
+                raise RuntimeError(f"GLPK no encontró solución entera (estado '{status}'): {source}")
+    return values
 
-            # intenta detectar name y activity:
-            # buscamos el primer token que parezca nombre (letras/underscore)
-            # y el último token numérico como activity.
-            name = None
-            activity = None
-            for tok in parts:
-                if name is None and re.fullmatch(r"[A-Za-z_][A-Za-z0-9_]*", tok):
-                    name = tok
-            # último numérico
-            for tok in reversed(parts):
-                if re.fullmatch(r"[-+]?\d+(\.\d+)?([eE][-+]?\d+)?", tok):
-                    activity = float(tok)
-                    break
-            if name is not None and activity is not None:
-                values[name] = activity
 
+def _glpsol_cmd(
+    glpsol: str, lp_path: str, sol_path: str, time_limit_seconds: Optional[int], warmstart: bool = False
+) -> List[str]:
+    cmd = [glpsol, "--lp", lp_path, "--mip", "--write", sol_path]
+    if time_limit_seconds is not None:
+        # GLPK usa --tmlim en segundos
+        cmd.extend(["--tmlim", str(int(time_limit_seconds))])
+    if warmstart:
+        # glpsol no acepta una solución entera inicial (--ini es una base del LP);
+        # la feasibility pump le busca una incumbente antes del branch & bound
+        cmd.append("--fpump")
+    return cmd
+
+
+def _run_glpsol_piped(
+    glpsol: str, lp: _LPModel, time_limit_seconds: Optional[int], warmstart: bool = False
+) -> Dict[str, float]:
+    """
+    Ejecuta glpsol sin ficheros intermedios (solo POSIX): el LP entra por stdin
+    mientras se escribe y la solución vuelve por un pipe aparte (/dev/fd/N), para
+    no mezclarla con el log que glpsol saca por stdout.
+    """
+    sol_r, sol_w = os.pipe()
+    cmd = _glpsol_cmd(glpsol, "/dev/stdin", f"/dev/fd/{sol_w}", time_limit_seconds, warmstart)
+    try:
+        proc = subprocess.Popen(
+            cmd, stdin=subprocess.PIPE, pass_fds=(sol_w,),
+            text=True, encoding="utf-8", bufsize=_LP_WRITE_BUFFER,
+        )
+    except BaseException:
+        os.close(sol_r)
+        raise
+    finally:
+        os.close(sol_w)
+
+    def feed() -> None:
+        try:
+            with proc.stdin:
+                lp.to_lp(proc.stdin)
+        except BrokenPipeError:
+            pass  # glpsol terminó antes de leerlo todo; lo dice su código de salida
+
+    # el LP se escribe en otro hilo: glpsol puede empezar a leer antes de que acabemos
+    feeder = threading.Thread(target=feed, daemon=True)
+    feeder.start()
+    try:
+        with open(sol_r, "r", encoding="utf-8") as f:
+            values = _read_glpsol_solution(f, lp.columns(), "glpsol")
+    finally:
+        feeder.join()
+        returncode = proc.wait()
+    if returncode:
+        raise subprocess.CalledProcessError(returncode, cmd)
     return values
 
 
@@ -469,43 +578,45 @@ def solve_with_glpk(
     problem: TimetableProblem,
     workdir: str = "glpk_out",
     lp_filename: str = "model.lp",
-    report_filename: str = "report.txt",
+    solution_filename: str = "solution.sol",
     time_limit_seconds: Optional[int] = None,
+    use_pipes: bool = True,
+    warmstart: bool = False,
 ) -> TimetableSolution:
     """
     - Genera MILP en LP
     - Llama glpsol si está disponible
-    - Parsea reporte y reconstruye TimetableSolution
+    - Lee la solución (--write) y reconstruye TimetableSolution
 
+    Con use_pipes (y en POSIX) el LP y la solución van por pipes; si no, se dejan
+    en workdir. warmstart activa la heurística de factibilidad de GLPK (--fpump).
     Requiere que 'glpsol' esté en PATH.
     """
     built = build_glpk_lp(problem)
 
-    os.makedirs(workdir, exist_ok=True)
     lp_path = os.path.join(workdir, lp_filename)
-    rep_path = os.path.join(workdir, report_filename)
-
-    with open(lp_path, "w", encoding="utf-8") as f:
-        f.write(built.lp.to_lp())
+    sol_path = os.path.join(workdir, solution_filename)
 
     glpsol = shutil.which("glpsol")
-    if not glpsol:
-        raise RuntimeError(
-            "No encuentro 'glpsol' en tu PATH. "
-            f"Te dejé el LP en: {lp_path}\n"
-            "Instala GLPK y ejecuta, por ejemplo:\n"
-            f"  glpsol --lp {lp_path} --mip -o {rep_path}"
-        )
-
-    cmd = [glpsol, "--lp", lp_path, "--mip", "-o", rep_path]
-    if time_limit_seconds is not None:
-        # GLPK usa --tmlim en segundos
-        cmd.extend(["--tmlim", str(int(time_limit_seconds))])
+    if glpsol and use_pipes and os.name == "posix":
+        values = _run_glpsol_piped(glpsol, built.lp, time_limit_seconds, warmstart)
+    else:
+        os.makedirs(workdir, exist_ok=True)
+        with open(lp_path, "w", encoding="utf-8", buffering=_LP_WRITE_BUFFER) as f:
+            built.lp.to_lp(f)
+
+        if not glpsol:
+            raise RuntimeError(
+                "No encuentro 'glpsol' en tu PATH. "
+                f"Te dejé el LP en: {lp_path}\n"
+                "Instala GLPK y ejecuta, por ejemplo:\n"
+                f"  glpsol --lp {lp_path} --mip --write {sol_path}"
+            )
 
-    subprocess.run(cmd, check=True)
+        subprocess.run(_glpsol_cmd(glpsol, lp_path, sol_path, time_limit_seconds, warmstart), check=True)
 
-    report_text = open(rep_path, "r", encoding="utf-8", errors="replace").read()
-    values = _parse_glpsol_report_for_values(report_text)
+        with open(sol_path, "r", encoding="utf-8") as f:
+            values = _read_glpsol_solution(f, built.lp.columns(), sol_path)
 
     # --- reconstruir horarios: elegir z=1 para cada evento
     scheduled: List[ScheduledEvent] = []
@@ -540,6 +651,6 @@ def export_glpk_lp(problem: TimetableProblem, path: str) -> str:
     """
     built = build_glpk_lp(problem)
     os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
-    with open(path, "w", encoding="utf-8") as f:
-        f.write(built.lp.to_lp())
+    with open(path, "w", encoding="utf-8", buffering=_LP_WRITE_BUFFER) as f:
+        built.lp.to_lp(f)
     return path
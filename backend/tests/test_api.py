@@ -0,0 +1,60 @@
+from fastapi.testclient import TestClient
+
+from app.main import create_app
+
+PROBLEM = {
+    "calendar": {"days": ["mon", "tue"], "periods_per_day": 3},
+    "groups": [{"id": "G1", "size": 20}],
+    "subjects": [{"id": "MATH"}],
+    "teachers": [{"id": "T1", "can_teach": ["MATH"]}],
+    "rooms": [{"id": "R1"}],
+    "requirements": [
+        {"group_id": "G1", "subject_id": "MATH", "periods_per_week": 2, "teacher_policy": "CHOOSE"}
+    ],
+    "config": {"max_seconds": 5, "random_seed": 1},
+}
+
+
+def test_solve_endpoint_returns_schedule() -> None:
+    client = TestClient(create_app())
+
+    response = client.post("/solve", json={"problem": PROBLEM})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert len(body["scheduled"]) == 2
+    assert body["teacher_assignment"] == [{"group_id": "G1", "subject_id": "MATH", "teacher_id": "T1"}]
+
+
+def test_solve_project_attaches_solution() -> None:
+    client = TestClient(create_app())
+    created = client.post("/projects", json={"name": "Demo", "problem": PROBLEM}).json()
+
+    response = client.post(f"/projects/{created['id']}/solve")
+
+    assert response.status_code == 200
+    detail = client.get(f"/projects/{created['id']}").json()
+    assert detail["last_solution"] == response.json()
+    assert any(p["id"] == created["id"] for p in client.get("/projects").json())
+
+
+def test_solve_endpoint_rejects_body_without_problem() -> None:
+    client = TestClient(create_app())
+
+    assert client.post("/solve", json={"calendar": {}}).status_code == 422
+    assert client.post("/solve", content=b"{not json").status_code == 400
+
+
+def test_get_project_honours_if_none_match() -> None:
+    client = TestClient(create_app())
+    created = client.post("/projects", json={"name": "Cached", "problem": PROBLEM}).json()
+
+    first = client.get(f"/projects/{created['id']}")
+    etag = first.headers["etag"]
+    cached = client.get(f"/projects/{created['id']}", headers={"If-None-Match": etag})
+    client.put(f"/projects/{created['id']}", json={"name": "Renamed"})
+    changed = client.get(f"/projects/{created['id']}", headers={"If-None-Match": etag})
+
+    assert cached.status_code == 304
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
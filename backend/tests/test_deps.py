@@ -5,3 +5,7 @@ from app.services.project_service import ProjectService
 def test_get_project_service_defaults_to_memory() -> None:
     service = get_project_service()
     assert isinstance(service, ProjectService)
+
+
+def test_memory_project_service_is_shared_between_calls() -> None:
+    assert get_project_service() is get_project_service()
@@ -0,0 +1,87 @@
+import os
+import re
+import sys
+
+import pytest
+
+from app.domain.core.io import problem_from_dict
+from tests.glpk_solver import _LPModel, _read_glpsol_solution, _run_glpsol_piped, build_glpk_lp
+
+PROBLEM = {
+    "calendar": {"days": ["mon", "tue"], "periods_per_day": 3},
+    "groups": [{"id": "G1", "size": 20}],
+    "subjects": [{"id": "MATH"}],
+    "teachers": [
+        {"id": "T1", "can_teach": ["MATH"], "unavailable": [{"day": "mon", "period": 1}]},
+        {"id": "T2", "can_teach": ["MATH"]},
+    ],
+    "rooms": [{"id": "R1"}, {"id": "R2"}],
+    "requirements": [
+        {"group_id": "G1", "subject_id": "MATH", "periods_per_week": 2, "teacher_policy": "CHOOSE"}
+    ],
+}
+
+WRITE_FILE = """c Problem:
+c Status:     INTEGER OPTIMAL
+s mip 2 3 o 4
+i 1 1
+i 2 0
+j 1 1
+j 2 0
+j 3 3
+e o f
+"""
+
+
+def _first_appearance(lp_text: str) -> list[str]:
+    return list(dict.fromkeys(re.findall(r"\bx\d+\b", lp_text)))
+
+
+def test_lp_columns_follow_first_appearance() -> None:
+    lp = _LPModel()
+    bounded = lp.add_var("I", 0, 5)
+    b1 = lp.add_var("B")
+    b2 = lp.add_var("B")
+    free = lp.add_var("C", 0)
+    lp.add_constr([b2, b1], "<=", 1, minus_terms=[free])
+    lp.add_obj_term(free, 3)
+    lp.add_obj_term(free, 2)
+
+    assert lp.columns() == [free, b2, b1, bounded]
+    assert lp.columns() == _first_appearance(lp.to_lp_str())
+    assert " 5 x4" in lp.to_lp_str()
+
+    built = build_glpk_lp(problem_from_dict(PROBLEM)).lp
+    assert built.columns() == _first_appearance(built.to_lp_str())
+
+
+def test_read_glpsol_write_file() -> None:
+    values = _read_glpsol_solution(WRITE_FILE.splitlines(True), ["x4", "x2", "x1"], "sol")
+
+    assert values == {"x4": 1.0, "x2": 0.0, "x1": 3.0}
+    with pytest.raises(RuntimeError, match="estado 'n'"):
+        _read_glpsol_solution(["s mip 2 3 n 0\n"], ["x4", "x2", "x1"], "sol")
+
+
+@pytest.mark.skipif(os.name != "posix", reason="/dev/stdin y /dev/fd/N solo en POSIX")
+def test_run_glpsol_piped_reads_write_pipe(tmp_path) -> None:
+    # glpsol falso: lee el LP de --lp y escribe una solución que fija a 1 la última columna
+    fake = tmp_path / "glpsol"
+    fake.write_text(
+        f"#!{sys.executable}\n"
+        "import re, sys\n"
+        "args = sys.argv[1:]\n"
+        "lp = open(args[args.index('--lp') + 1]).read()\n"
+        "cols = list(dict.fromkeys(re.findall(r'\\bx\\d+\\b', lp)))\n"
+        "with open(args[args.index('--write') + 1], 'w') as f:\n"
+        "    f.write(f's mip 1 {len(cols)} o 1\\n')\n"
+        "    f.write(''.join(f'j {j} {int(j == len(cols))}\\n' for j in range(1, len(cols) + 1)))\n"
+        "print('log' if '--fpump' in args else '')\n"
+    )
+    fake.chmod(0o755)
+    lp = _LPModel()
+    first = lp.add_var("B")
+    second = lp.add_var("B")
+    lp.add_constr([second, first], "<=", 1)
+
+    assert _run_glpsol_piped(str(fake), lp, 5, warmstart=True) == {second: 0.0, first: 1.0}
@@ -29,3 +29,13 @@ def test_attach_solution_updates_last_solution() -> None:
     updated = service.attach_solution(created.id, solution)
 
     assert updated.last_solution == solution
+
+
+def test_list_projects_paginates_in_creation_order() -> None:
+    service = ProjectService(repository=InMemoryProjectRepository())
+    for name in ("A", "B", "C"):
+        service.create_project(name=name, problem={})
+
+    assert [p.name for p in service.list_projects()] == ["A", "B", "C"]
+    assert [p.name for p in service.list_projects(limit=1, offset=1)] == ["B"]
+    assert [p.name for p in service.list_projects(offset=2)] == ["C"]
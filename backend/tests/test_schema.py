@@ -0,0 +1,36 @@
+from app.domain.core.schema import Calendar, CourseRequirement, Room, Slot, Teacher, TimetableProblem
+
+
+def test_availability_masks_use_calendar_slot_bits() -> None:
+    cal = Calendar(days=("mon", "tue", "fri"), periods_per_day=6)
+    teacher = Teacher(id="T1", unavailable=frozenset({Slot("mon", 1), Slot("fri", 6), Slot("sat", 1)}))
+    room = Room(id="R1", unavailable=frozenset({Slot("tue", 2)}))
+    problem = TimetableProblem(
+        calendar=cal, groups=(), subjects=(), teachers=(teacher,), rooms=(room,), requirements=()
+    )
+
+    assert cal.slot_bit(Slot("mon", 1)) == 0
+    assert cal.slot_bit(Slot("fri", 6)) == 17
+    assert cal.slot_bit(Slot("sat", 1)) is None
+    assert cal.slot_bit(Slot("mon", 7)) is None
+    assert problem.teacher_unavailable_masks() == {"T1": (1 << 0) | (1 << 17)}
+    assert problem.room_unavailable_masks() == {"R1": 1 << 7}
+    assert not teacher.is_available(Slot("mon", 1))
+    assert teacher.is_available(Slot("mon", 2))
+    assert not room.is_available(Slot("tue", 2))
+    assert cal == Calendar(days=("mon", "tue", "fri"), periods_per_day=6)
+
+
+def test_requirement_period_masks() -> None:
+    req = CourseRequirement(
+        group_id="G1", subject_id="MATH", periods_per_week=2,
+        preferred_periods=[2, 3], forbidden_periods=frozenset({6, -1}),
+    )
+
+    assert req.preferred_mask == (1 << 2) | (1 << 3)
+    assert req.forbidden_mask == 1 << 6
+    assert CourseRequirement(group_id="G1", subject_id="MATH", periods_per_week=2).forbidden_mask == 0
+    assert req == CourseRequirement(
+        group_id="G1", subject_id="MATH", periods_per_week=2,
+        preferred_periods=frozenset({2, 3}), forbidden_periods=frozenset({6, -1}),
+    )
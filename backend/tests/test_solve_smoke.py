@@ -23,3 +23,26 @@ def test_problem_from_dict_smoke() -> None:
     assert problem.calendar.periods_per_day == 6
     assert len(problem.groups) == 1
     assert len(problem.requirements) == 1
+    assert problem.config.linearization_level is None
+
+    tuned = problem_from_dict({**payload, "config": {"linearization_level": "2"}})
+    assert tuned.config.linearization_level == 2
+
+
+def test_problem_from_dict_interns_only_string_ids() -> None:
+    payload = {
+        "calendar": {"days": ["mon"], "periods_per_day": 2},
+        "groups": [{"id": "".join(["G", "1"]), "size": 20}, {"id": 7, "size": 20}],
+        "subjects": [{"id": "MATH"}],
+        "teachers": [{"id": "T1", "can_teach": ["MATH", 7]}],
+        "rooms": [{"id": "R1"}],
+        "requirements": [
+            {"group_id": "".join(["G", "1"]), "subject_id": "MATH", "periods_per_week": 1, "teacher_id": "T1"}
+        ],
+    }
+
+    problem = problem_from_dict(payload)
+
+    assert problem.groups[0].id is problem.requirements[0].group_id
+    assert problem.groups[1].id == 7
+    assert problem.teachers[0].can_teach == frozenset({"MATH", "7"})
@@ -1,3 +1,6 @@
+import copy
+from dataclasses import replace
+
 from app.services.solver_service import SolverService
 
 
@@ -16,3 +19,199 @@ def test_solver_service_validate_works_without_solver_runtime() -> None:
 
     assert report.ok is False
     assert report.errors
+
+
+def test_solver_service_reuses_solution_for_identical_payload() -> None:
+    service = SolverService()
+    payload = {
+        "calendar": {"days": ["mon"], "periods_per_day": 2},
+        "groups": [{"id": "G1", "size": 10}],
+        "subjects": [{"id": "MATH"}],
+        "teachers": [{"id": "T1", "can_teach": ["MATH"]}],
+        "rooms": [{"id": "R1"}],
+        "requirements": [{"group_id": "G1", "subject_id": "MATH", "periods_per_week": 1, "teacher_id": "T1"}],
+        "config": {"max_seconds": 5, "random_seed": 1},
+    }
+
+    first = service.solve_problem(payload)
+    reordered = dict(reversed(list(payload.items())))
+
+    assert service.solve_problem(reordered) == first
+
+
+def test_solver_service_cache_hits_return_fresh_dicts() -> None:
+    service = SolverService()
+    payload = {
+        "calendar": {"days": ["mon"], "periods_per_day": 2},
+        "groups": [{"id": "G1", "size": 10}],
+        "subjects": [{"id": "MATH"}],
+        "teachers": [{"id": "T1", "can_teach": ["MATH"]}],
+        "rooms": [{"id": "R1"}],
+        "requirements": [{"group_id": "G1", "subject_id": "MATH", "periods_per_week": 1, "teacher_id": "T1"}],
+        "config": {"max_seconds": 5, "random_seed": 1},
+    }
+
+    first = service.solve_problem(payload)
+    expected = copy.deepcopy(first)
+    first["objective_breakdown"]["x"] = 1
+    first["scheduled"][0]["slot"]["period"] = 99
+    second = service.solve_problem(payload)
+    second["scheduled"].clear()
+
+    assert second is not first
+    assert service.solve_problem(payload) == expected
+
+
+def test_solver_service_only_caches_optimal_solutions(monkeypatch) -> None:
+    from app.domain.solver import solve as solve_module
+
+    service = SolverService()
+    payload = {
+        "calendar": {"days": ["mon"], "periods_per_day": 2},
+        "groups": [{"id": "G1", "size": 10}],
+        "subjects": [{"id": "MATH"}],
+        "teachers": [{"id": "T1", "can_teach": ["MATH"]}],
+        "rooms": [{"id": "R1"}],
+        "requirements": [{"group_id": "G1", "subject_id": "MATH", "periods_per_week": 1, "teacher_id": "T1"}],
+        "config": {"max_seconds": 5, "random_seed": 1},
+    }
+    calls = []
+    real_solve = solve_module.solve
+
+    def time_limited_solve(problem, hint=None):
+        calls.append(problem)
+        return replace(real_solve(problem, hint=hint), optimal=False)
+
+    monkeypatch.setattr(solve_module, "solve", time_limited_solve)
+    service.solve_problem(payload)
+    service.solve_problem(payload)
+
+    assert len(calls) == 2
+
+
+def test_solver_service_applies_default_workers(monkeypatch) -> None:
+    from app.domain.solver import solve as solve_module
+
+    service = SolverService(cache_size=0, default_workers=2)
+    payload = {
+        "calendar": {"days": ["mon"], "periods_per_day": 2},
+        "groups": [{"id": "G1", "size": 10}],
+        "subjects": [{"id": "MATH"}],
+        "teachers": [{"id": "T1", "can_teach": ["MATH"]}],
+        "rooms": [{"id": "R1"}],
+        "requirements": [{"group_id": "G1", "subject_id": "MATH", "periods_per_week": 1, "teacher_id": "T1"}],
+        "config": {"max_seconds": 5, "random_seed": 1},
+    }
+    workers = []
+    real_solve = solve_module.solve
+
+    def recording_solve(problem, hint=None):
+        workers.append(problem.config.num_workers)
+        return real_solve(problem, hint=hint)
+
+    monkeypatch.setattr(solve_module, "solve", recording_solve)
+    service.solve_problem(payload)
+    service.solve_problem({**payload, "config": {**payload["config"], "num_workers": 1}})
+
+    assert workers == [2, 1]
+
+
+def test_solver_service_uses_previous_solution_as_hint() -> None:
+    service = SolverService(cache_size=0)
+    payload = {
+        "calendar": {"days": ["mon", "tue"], "periods_per_day": 3},
+        "groups": [{"id": "G1", "size": 10}],
+        "subjects": [{"id": "MATH"}],
+        "teachers": [{"id": "T1", "can_teach": ["MATH"]}, {"id": "T2", "can_teach": ["MATH"]}],
+        "rooms": [{"id": "R1"}],
+        "requirements": [
+            {"group_id": "G1", "subject_id": "MATH", "periods_per_week": 2, "teacher_policy": "CHOOSE"}
+        ],
+        "config": {"max_seconds": 5, "random_seed": 1},
+    }
+
+    first = service.solve_problem(payload)
+    warm = service.solve_problem(payload, first)
+    malformed = service.solve_problem(payload, {"scheduled": [{"event_id": "x"}]})
+
+    assert warm["objective_value"] == first["objective_value"]
+    assert len(malformed["scheduled"]) == 2
+
+
+def test_solver_service_resolve_with_hint_bypasses_cache(monkeypatch) -> None:
+    from app.domain.solver import solve as solve_module
+
+    service = SolverService()
+    payload = {
+        "calendar": {"days": ["mon"], "periods_per_day": 2},
+        "groups": [{"id": "G1", "size": 10}],
+        "subjects": [{"id": "MATH"}],
+        "teachers": [{"id": "T1", "can_teach": ["MATH"]}],
+        "rooms": [{"id": "R1"}],
+        "requirements": [{"group_id": "G1", "subject_id": "MATH", "periods_per_week": 1, "teacher_id": "T1"}],
+        "config": {"max_seconds": 5, "random_seed": 1},
+    }
+    hints = []
+    real_solve = solve_module.solve
+
+    def recording_solve(problem, hint=None):
+        hints.append(hint)
+        return real_solve(problem, hint=hint)
+
+    monkeypatch.setattr(solve_module, "solve", recording_solve)
+    first = service.solve_problem(payload)
+    service.solve_problem(payload)
+    service.solve_problem(payload, first)
+
+    assert len(hints) == 2
+    assert hints[0] is None and hints[1] is not None
+
+
+def test_solver_service_reuses_validation_for_identical_payload() -> None:
+    service = SolverService()
+    payload = {
+        "calendar": {"days": ["mon"], "periods_per_day": 2},
+        "groups": [{"id": "G1", "size": 10}, {"id": "G1", "size": 10}],
+        "subjects": [],
+        "teachers": [],
+        "rooms": [],
+        "requirements": [],
+    }
+
+    first = service.validate_problem(payload)
+
+    assert first.ok is False
+    assert service.validate_problem(dict(reversed(list(payload.items())))) is first
+
+
+def test_solver_service_tabu_warmstart(monkeypatch) -> None:
+    from app.domain.solver import local_search
+    from app.domain.solver.local_search import tabu_search
+
+    service = SolverService(cache_size=0)
+    payload = {
+        "calendar": {"days": ["mon", "tue"], "periods_per_day": 3},
+        "groups": [{"id": "G1", "size": 10}, {"id": "G2", "size": 10}],
+        "subjects": [{"id": "MATH"}, {"id": "LANG"}],
+        "teachers": [{"id": "T1", "can_teach": ["MATH", "LANG"]}, {"id": "T2", "can_teach": ["MATH", "LANG"]}],
+        "rooms": [{"id": "R1"}, {"id": "R2"}],
+        "requirements": [
+            {"group_id": g, "subject_id": s, "periods_per_week": 3, "teacher_policy": "CHOOSE"}
+            for g in ("G1", "G2")
+            for s in ("MATH", "LANG")
+        ],
+        "config": {"max_seconds": 5, "random_seed": 1, "warmstart": True},
+    }
+
+    hints = []
+
+    def recording_tabu_search(*args, **kwargs):
+        hints.append(tabu_search(*args, **kwargs))
+        return hints[-1]
+
+    monkeypatch.setattr(local_search, "tabu_search", recording_tabu_search)
+    solution = service.solve_problem(payload)
+
+    assert len(hints) == 1
+    assert hints[0] is not None and hints[0].objective_breakdown["hard_violations"] == 0
+    assert len(solution["scheduled"]) == 12
@@ -16,3 +16,21 @@ def test_validate_reports_errors_for_invalid_problem() -> None:
 
     assert report.ok is False
     assert any("Calendar.days está vacío." in err for err in report.errors)
+
+
+def test_validate_fail_fast_stops_after_first_failing_phase() -> None:
+    problem = {
+        "calendar": {"days": [], "periods_per_day": 6},
+        "groups": [{"id": "G1", "size": 20}, {"id": "G1", "size": 20}],
+        "subjects": [],
+        "teachers": [],
+        "rooms": [],
+        "requirements": [],
+    }
+
+    full = validate_problem(problem_from_dict(problem), raise_on_error=False)
+    fast = validate_problem(problem_from_dict(problem), raise_on_error=False, fail_fast=True)
+
+    assert any("duplicados" in err for err in full.errors)
+    assert fast.ok is False
+    assert fast.errors == ["Calendar.days está vacío."]